@@ -0,0 +1,96 @@
+"""
+Размер копий изображений публикаций в исходном формате и в
+современных форматах (WebP, AVIF при поддержке Pillow).
+
+Запуск из корня репозитория:
+    python benchmarks/image_formats.py [изображение ...]
+Без аргументов используются синтетические фотографии.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'blogicum'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from PIL import Image, ImageDraw, ImageFilter, ImageOps  # noqa: E402
+
+from blog.images import encode, get_modern_formats  # noqa: E402
+
+
+def make_samples(count=5, size=(3000, 2000)):
+    """Фотоподобные изображения: градиент, шум и размытые фигуры."""
+    samples = []
+    for seed in range(count):
+        gradient = Image.linear_gradient('L').resize(size).rotate(seed * 40)
+        noise = Image.effect_noise(size, 24 + seed * 8)
+        image = Image.merge('RGB', (
+            gradient, noise, ImageOps.invert(gradient)
+        ))
+        draw = ImageDraw.Draw(image)
+        for shape in range(12):
+            x = (shape * 397 + seed * 131) % size[0]
+            y = (shape * 211) % size[1]
+            draw.ellipse(
+                (x, y, x + 400, y + 300),
+                fill=(shape * 20 % 256, seed * 50 % 256, 120)
+            )
+        image = image.filter(ImageFilter.GaussianBlur(2))
+        samples.append((f'sample-{seed + 1}.jpg', image, 'JPEG'))
+    return samples
+
+
+def load(paths):
+    samples = []
+    for path in paths:
+        with Image.open(path) as image:
+            image_format = image.format
+            samples.append((Path(path).name, ImageOps.exif_transpose(image),
+                            image_format))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('paths', nargs='*')
+    args = parser.parse_args()
+    samples = load(args.paths) if args.paths else make_samples()
+    formats = get_modern_formats()
+    widths = settings.POST_IMAGE_WIDTHS
+    totals = {}
+    print(f'Форматы: {", ".join(formats)}; ширина копий: {widths}')
+    for name, image, image_format in samples:
+        width, height = image.size
+        for target in widths:
+            if target >= width:
+                continue
+            copy = image.resize((target, round(height * target / width)),
+                                Image.Resampling.LANCZOS)
+            sizes = {image_format: len(encode(copy, image_format))}
+            for modern_format in formats:
+                sizes[modern_format] = len(encode(copy, modern_format))
+            line = ', '.join(
+                f'{key} {value:>8}' for key, value in sizes.items()
+            )
+            print(f'{name:>16} {target:>5}w: {line}')
+            for key, value in sizes.items():
+                totals.setdefault(target, {}).setdefault(key, 0)
+                totals[target][key] += value
+    print('Итого по ширине копии:')
+    for target, sizes in totals.items():
+        (base_format, base), *modern = sizes.items()
+        line = ', '.join(
+            f'{key} {value:>9} байт (экономия {1 - value / base:.0%})'
+            for key, value in modern
+        )
+        print(f'{target:>5}w: {base_format} {base:>9} байт, {line}')
+
+
+if __name__ == '__main__':
+    main()
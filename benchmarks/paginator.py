@@ -0,0 +1,82 @@
+"""
+Размер и время отрисовки includes/paginator.html для большой ленты:
+полный список номеров страниц против свёрнутого.
+
+Запуск из корня репозитория:
+    python benchmarks/paginator.py --posts 500000
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+from timeit import repeat
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'blogicum'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.paginator import Paginator  # noqa: E402
+from django.template import Template  # noqa: E402
+from django.template.loader import get_template  # noqa: E402
+
+from blog.paginators import LeanCountPaginator  # noqa: E402
+
+FULL_RANGE_TEMPLATE = Template('''
+{% for i in page_obj.paginator.page_range %}
+  {% if page_obj.number == i %}
+    <li class="page-item active">
+      <span class="page-link">{{ i }}</span>
+    </li>
+  {% else %}
+    <li class="page-item">
+      <a class="page-link" href="?page={{ i }}">{{ i }}</a>
+    </li>
+  {% endif %}
+{% endfor %}
+''')
+
+
+def measure(render, number):
+    content = render()
+    seconds = min(repeat(render, number=number, repeat=3)) / number
+    return len(content.encode()), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=500_000)
+    parser.add_argument('--number', type=int, default=5)
+    args = parser.parse_args()
+
+    posts = range(args.posts)
+    page_number = args.posts // settings.SHOW_POSTS // 2
+    before_page = Paginator(posts, settings.SHOW_POSTS).page(page_number)
+    after_page = LeanCountPaginator(
+        posts, settings.SHOW_POSTS
+    ).page(page_number)
+    after_template = get_template('includes/paginator.html')
+
+    results = {
+        'до (page_range)': measure(
+            lambda: FULL_RANGE_TEMPLATE.render(
+                django.template.Context({'page_obj': before_page})
+            ),
+            args.number,
+        ),
+        'после (elided_page_range)': measure(
+            lambda: after_template.render({'page_obj': after_page}),
+            args.number,
+        ),
+    }
+    print(f'Публикаций: {args.posts}, страниц: '
+          f'{before_page.paginator.num_pages}')
+    for name, (size, seconds) in results.items():
+        print(f'{name:>28}: {size:>12} байт, {seconds * 1000:10.3f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@ from django.contrib import admin
 from django.contrib.auth.models import Group
 from django.template.defaultfilters import truncatewords
 
+from . import search
 from .models import Category, Location, Post
 
 admin.site.empty_value_display = 'Нет данных'
@@ -35,8 +36,17 @@ class PostAdmin(admin.ModelAdmin):
         'category'
     )
     list_filter = ('category',)
+    list_select_related = ('author', 'location', 'category')
     search_fields = ('title',)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу вместо LIKE по заголовку."""
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return search.filter_posts(
+            queryset, search_term, visible_only=False
+        ), False
+
 
 class PostInline(admin.StackedInline):
     """Вставка списка постов для связанной модели."""
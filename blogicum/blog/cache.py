@@ -0,0 +1,152 @@
+import math
+import time
+from collections import defaultdict
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from .models import Category
+
+GENERATION_KEY = 'blog:generation:{}'
+CHANGED_KEY = 'blog:changed:{}'
+
+
+def _initial_generation():
+    """
+    Начальное значение счётчика. Берётся от текущего времени, чтобы
+    счётчик, вытесненный из кеша, не вернулся к уже занятым значениям.
+    """
+    return time.time_ns() // 1000
+
+
+def get_generations(scopes):
+    """Текущие поколения областей кеша одним обращением к кешу."""
+    keys = {GENERATION_KEY.format(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    generations = {}
+    for key, scope in keys.items():
+        if key not in found:
+            initial = _initial_generation()
+            cache.add(key, initial, None)
+            found[key] = cache.get(key, initial)
+        generations[scope] = found[key]
+    return generations
+
+
+def bump_generations(scopes):
+    """
+    Сброс областей кеша сменой поколения: старые ключи становятся
+    недостижимыми и вытесняются по истечении срока хранения.
+    """
+    scopes = set(scopes)
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(), None)
+    changed_at = math.ceil(time.time())
+    cache.set_many(
+        {CHANGED_KEY.format(scope): changed_at for scope in scopes}, None
+    )
+
+
+def get_changed_at(scopes):
+    """
+    Время последнего сброса областей кеша в секундах, округлённое вверх
+    до точности заголовка Last-Modified. Сброс отражает и удаление
+    объектов, которого не видно по их updated_at. Для областей, время
+    сброса которых не сохранилось в кеше, берётся текущее время.
+    """
+    keys = [CHANGED_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    now = math.ceil(time.time())
+    missing = {key: now for key in keys if key not in found}
+    for key, changed_at in missing.items():
+        cache.add(key, changed_at, None)
+    return max((*found.values(), *missing.values()), default=None)
+
+
+def make_key(prefix, scopes, *parts):
+    """Ключ кеша, устаревающий при смене поколения любой из областей."""
+    generations = get_generations(scopes)
+    version = '.'.join(str(generations[scope]) for scope in scopes)
+    return ':'.join(('blog', prefix, version, *map(str, parts)))
+
+
+def get_page_cache_key(request, scopes):
+    path = md5(request.get_full_path().encode()).hexdigest()
+    return make_key('page', scopes, path)
+
+
+class InvalidationRegistry:
+    """
+    Реестр инвалидации: сопоставляет сохранение и удаление объектов
+    моделей с областями кеша, которые они затрагивают.
+    """
+
+    def __init__(self):
+        self._handlers = defaultdict(list)
+
+    def register(self, model, ignore_fields=()):
+        """
+        Декоратор функции, возвращающей области кеша для объекта модели.
+        Сохранение только полей из ignore_fields кеш не сбрасывает.
+        """
+        def decorator(func):
+            self._handlers[model].append((func, frozenset(ignore_fields)))
+            return func
+        return decorator
+
+    def get_scopes(self, instance, update_fields=None):
+        scopes = set()
+        for func, ignore_fields in self._handlers[type(instance)]:
+            if update_fields and set(update_fields) <= ignore_fields:
+                continue
+            scopes.update(func(instance))
+        return scopes
+
+    def invalidate(self, sender, instance, update_fields=None, **kwargs):
+        bump_generations(self.get_scopes(instance, update_fields))
+
+    def connect(self):
+        for model in self._handlers:
+            for signal in (post_save, post_delete):
+                signal.connect(
+                    self.invalidate, sender=model, weak=False,
+                    dispatch_uid=f'blog_cache_{model._meta.label_lower}'
+                )
+
+
+registry = InvalidationRegistry()
+
+
+_local_categories = {}
+_missing = object()
+
+
+def get_published_category(slug):
+    """
+    Опубликованная категория по slug или None.
+    Найденные категории хранятся в памяти процесса и в общем кеше под
+    ключом с поколениями областей кеша, так что сохранение категории
+    сразу делает обе копии недостижимыми; срок хранения ограничен
+    CATEGORY_CACHE_TIMEOUT.
+    """
+    key = make_key('category', (f'category:{slug}', 'taxonomy'), slug)
+    local = _local_categories.get(slug)
+    if local and local[0] == key and local[1] > time.monotonic():
+        return local[2]
+    category = cache.get(key, _missing)
+    if category is _missing:
+        category = Category.objects.filter(
+            is_published=True, slug=slug
+        ).first()
+        cache.set(key, category, settings.CATEGORY_CACHE_TIMEOUT)
+    if category is not None:
+        _local_categories[slug] = (
+            key, time.monotonic() + settings.CATEGORY_CACHE_TIMEOUT, category
+        )
+    return category
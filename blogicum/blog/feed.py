@@ -0,0 +1,112 @@
+from django.db import transaction
+from django.db.models import Min
+from django.utils.timezone import now
+
+from . import search
+from .cache import bump_generations, registry
+from .models import FeedEntry, Post
+
+FEED_FIELDS = ('pub_date', 'category_id', 'author_id', 'comment_count')
+
+
+def get_scheduled_posts():
+    """Опубликованные посты опубликованных категорий, включая будущие."""
+    return Post.objects.filter(
+        is_published=True, category__is_published=True
+    )
+
+
+def get_feed_source():
+    """Посты, которым положено быть в ленте, в виде строк ленты."""
+    return get_scheduled_posts().filter(
+        pub_date__lte=now()
+    ).values('pk', *FEED_FIELDS)
+
+
+def sync_post(post_id):
+    """Добавление, обновление или удаление строки ленты одного поста."""
+    row = get_feed_source().filter(pk=post_id).first()
+    if row is None:
+        FeedEntry.objects.filter(post_id=post_id).delete()
+        return
+    FeedEntry.objects.update_or_create(
+        post_id=row.pop('pk'), defaults=row
+    )
+
+
+def sync_category(category):
+    """Строки ленты всех постов категории после её изменения."""
+    if not category.is_published:
+        FeedEntry.objects.filter(category=category).delete()
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(post_id=row.pop('pk'), **row)
+            for row in get_feed_source().filter(category=category)
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def reconcile(batch_size=1000):
+    """
+    Сверка ленты с таблицей публикаций: удаляет лишние строки,
+    добавляет недостающие и исправляет расхождения.
+    Возвращает количество удалённых, добавленных и обновлённых строк.
+    """
+    with transaction.atomic():
+        stale = FeedEntry.objects.exclude(
+            post__in=get_feed_source().values('pk')
+        )
+        stale_ids = list(stale.values_list('post_id', flat=True))
+        deleted, _ = stale.delete()
+        existing = {
+            row[0]: row[1:]
+            for row in FeedEntry.objects.values_list('post_id', *FEED_FIELDS)
+        }
+        missing, changed = [], []
+        for row in get_feed_source().iterator(chunk_size=batch_size):
+            entry = FeedEntry(post_id=row.pop('pk'), **row)
+            values = tuple(row[field] for field in FEED_FIELDS)
+            if entry.post_id not in existing:
+                missing.append(entry)
+            elif existing[entry.post_id] != values:
+                changed.append(entry)
+        FeedEntry.objects.bulk_create(missing, batch_size=batch_size)
+        FeedEntry.objects.bulk_update(
+            changed, FEED_FIELDS, batch_size=batch_size
+        )
+    if stale_ids or missing:
+        search.update_visibility(Post.objects.filter(
+            pk__in=stale_ids + [entry.post_id for entry in missing]
+        ))
+    if deleted or missing or changed:
+        bump_generations(('feed', 'taxonomy'))
+    return deleted, len(missing), len(changed)
+
+
+def publish_due():
+    """
+    Перевод в ленту постов, дата публикации которых наступила, со
+    сбросом кеша затронутых страниц. Возвращает число постов.
+    """
+    rows = list(get_feed_source().filter(feed_entry__isnull=True))
+    entries = [FeedEntry(post_id=row.pop('pk'), **row) for row in rows]
+    FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    search.update_visibility(
+        Post.objects.filter(pk__in=[entry.post_id for entry in entries])
+    )
+    scopes = set()
+    for entry in entries:
+        scopes |= registry.get_scopes(
+            Post(pk=entry.post_id, author_id=entry.author_id)
+        )
+    bump_generations(scopes)
+    return len(entries)
+
+
+def get_next_pub_date():
+    """Ближайшая дата публикации отложенного поста или None."""
+    return get_scheduled_posts().filter(
+        pub_date__gt=now()
+    ).aggregate(next_pub_date=Min('pub_date'))['next_pub_date']
@@ -0,0 +1,145 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .models import Post
+
+SAVE_FORMATS = {
+    'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'AVIF': '.avif'
+}
+
+
+def get_modern_formats():
+    """Форматы из POST_IMAGE_MODERN_FORMATS, которые умеет писать Pillow."""
+    Image.init()
+    return [image_format for image_format in settings.POST_IMAGE_MODERN_FORMATS
+            if image_format in Image.SAVE]
+
+
+def get_derivative_name(name, width, extension):
+    """Имя копии рядом с оригиналом: blog_images/photo_640w.jpg."""
+    root, _ = os.path.splitext(name)
+    return f'{root}_{width}w{extension}'
+
+
+def encode(image, image_format):
+    """Содержимое файла изображения в заданном формате."""
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, image_format, optimize=True,
+               quality=settings.POST_IMAGE_QUALITY[image_format])
+    return buffer.getvalue()
+
+
+def make_derivatives(storage, name):
+    """
+    Уменьшенные копии изображения шириной из POST_IMAGE_WIDTHS,
+    сохранённые в том же хранилище рядом с оригиналом, и их версии в
+    современных форматах, включая версию в полную ширину. Копии не шире
+    оригинала не создаются. Возвращает описание для
+    Post.image_derivatives.
+    """
+    with storage.open(name, 'rb') as file, Image.open(file) as source:
+        image_format = (source.format if source.format in SAVE_FORMATS
+                        else 'JPEG')
+        source = ImageOps.exif_transpose(source)
+        width, height = source.size
+        resized = {
+            target: source.resize(
+                (target, round(height * target / width)),
+                Image.Resampling.LANCZOS
+            )
+            for target in settings.POST_IMAGE_WIDTHS if target < width
+        }
+        sizes = {
+            str(target): storage.save_derivative(
+                get_derivative_name(
+                    name, target, SAVE_FORMATS[image_format]
+                ),
+                ContentFile(encode(copy, image_format))
+            )
+            for target, copy in resized.items()
+        }
+        resized[width] = source
+        formats = {
+            Image.MIME[modern_format]: {
+                str(target): storage.save_derivative(
+                    get_derivative_name(
+                        name, target, SAVE_FORMATS[modern_format]
+                    ),
+                    ContentFile(encode(copy, modern_format))
+                )
+                for target, copy in resized.items()
+            }
+            for modern_format in get_modern_formats()
+            if modern_format != image_format
+        }
+    return {
+        'source': name,
+        'width': width,
+        'height': height,
+        'sizes': sizes,
+        'formats': formats,
+    }
+
+
+def delete_derivatives(storage, derivatives):
+    names = list(derivatives.get('sizes', {}).values())
+    for sizes in derivatives.get('formats', {}).values():
+        names.extend(sizes.values())
+    for name in names:
+        storage.delete(name)
+
+
+def release_image(storage, name, derivatives):
+    """
+    Удаление файла изображения и его копий, если на него больше не
+    ссылается ни одна публикация. Одинаковые изображения хранятся
+    один раз, поэтому файл удаляется вместе с последней ссылкой.
+    Ссылки проверяются, а файлы удаляются после фиксации транзакции:
+    при её откате файл остаётся на месте, а публикация с тем же файлом,
+    сохранённая тем временем, удерживает его.
+    """
+    if not name:
+        return
+
+    def delete():
+        if Post.objects.filter(image=name).exists():
+            return
+        delete_derivatives(storage, derivatives)
+        storage.delete(name)
+
+    transaction.on_commit(delete)
+
+
+def get_shared_derivatives(post):
+    """Готовые копии того же файла у другой публикации или None."""
+    others = Post.objects.filter(image=post.image.name).exclude(
+        pk=post.pk
+    ).values_list('image_derivatives', flat=True)
+    for derivatives in others:
+        if (derivatives.get('source') == post.image.name
+                and 'sizes' in derivatives):
+            return derivatives
+    return None
+
+
+def derivatives_ready(post):
+    """Копии текущего изображения публикации готовы."""
+    derivatives = post.image_derivatives or {}
+    return (derivatives.get('source') == post.image.name
+            and 'sizes' in derivatives)
+
+
+def derivatives_outdated(post):
+    """Копии готовы, но среди них нет части доступных форматов."""
+    formats = post.image_derivatives.get('formats', {})
+    return derivatives_ready(post) and any(
+        Image.MIME[image_format] not in formats
+        for image_format in get_modern_formats()
+    )
@@ -0,0 +1,146 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils.timezone import now
+
+from . import images
+from .cache import bump_generations, registry
+from .models import ImageJob, Post
+
+
+def get_image_storage():
+    return Post._meta.get_field('image').storage
+
+
+def enqueue(post, force=False, previous=None):
+    """
+    Постановка в очередь копий нового изображения публикации.
+    Прежнее изображение освобождается сразу: и то, для которого
+    записаны копии, и previous — имя файла до сохранения, у которого
+    копий могло не быть. Незавершённые задания удаляются; до готовности
+    новых копий выводится заглушка. Копии файла, уже обработанного для
+    другой публикации, используются повторно без задания.
+    """
+    derivatives = post.image_derivatives or {}
+    name = post.image.name or ''
+    for old_name in {derivatives.get('source'), previous} - {None, '', name}:
+        images.release_image(
+            get_image_storage(), old_name,
+            derivatives if old_name == derivatives.get('source') else {}
+        )
+    if derivatives.get('source', '') == name and not force:
+        return None
+    shared = images.get_shared_derivatives(post) if name else None
+    if shared is not None:
+        post.image_derivatives = shared
+    else:
+        post.image_derivatives = {'source': name} if name else {}
+    Post.objects.filter(pk=post.pk).update(
+        image_derivatives=post.image_derivatives
+    )
+    ImageJob.objects.filter(post_id=post.pk).delete()
+    if name and shared is None:
+        return ImageJob.objects.create(post_id=post.pk, source=name)
+    return None
+
+
+def claim(limit):
+    """
+    Захват заданий из очереди. Задание захватывает тот обработчик, чей
+    условный UPDATE его изменил, поэтому несколько обработчиков не
+    выполняют одно задание дважды. Зависшие задания возвращаются в
+    очередь через POST_IMAGE_JOB_TIMEOUT секунд.
+    """
+    started = now()
+    ImageJob.objects.filter(
+        status=ImageJob.RUNNING,
+        started_at__lt=started - timedelta(
+            seconds=settings.POST_IMAGE_JOB_TIMEOUT
+        )
+    ).update(status=ImageJob.PENDING)
+    claimed = []
+    pending = ImageJob.objects.filter(
+        status=ImageJob.PENDING
+    ).select_related('post').only(
+        'source', 'attempts', 'post__author_id'
+    )[:limit]
+    for job in pending:
+        if ImageJob.objects.filter(
+            pk=job.pk, status=ImageJob.PENDING
+        ).update(
+            status=ImageJob.RUNNING,
+            started_at=started,
+            attempts=F('attempts') + 1
+        ):
+            job.attempts += 1
+            claimed.append(job)
+    return claimed
+
+
+def render(name):
+    """
+    Изготовление копий в процессе-обработчике. Обращается только к
+    хранилищу файлов, не к базе данных. Возвращает пару (описание
+    копий, None) или (None, текст ошибки).
+    """
+    try:
+        return images.make_derivatives(get_image_storage(), name), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def finish(job, derivatives, error):
+    """Сохранение результата задания и сброс кеша страниц публикации."""
+    if error:
+        if job.attempts < settings.POST_IMAGE_JOB_ATTEMPTS:
+            ImageJob.objects.filter(pk=job.pk).update(
+                status=ImageJob.PENDING, error=error
+            )
+            return
+        ImageJob.objects.filter(pk=job.pk).update(
+            status=ImageJob.FAILED, error=error
+        )
+        derivatives = {'source': job.source, 'sizes': {}}
+    else:
+        ImageJob.objects.filter(pk=job.pk).delete()
+    updated = Post.objects.filter(
+        pk=job.post_id, image=job.source
+    ).update(image_derivatives=derivatives)
+    if not updated:
+        images.release_image(get_image_storage(), job.source, derivatives)
+        return
+    bump_generations(registry.get_scopes(job.post))
+
+
+def run_pending(limit=20, map_func=map):
+    """
+    Выполнение заданий из очереди; map_func распределяет изготовление
+    копий по процессам, например ProcessPoolExecutor.map.
+    Возвращает число выполненных заданий.
+    """
+    jobs = claim(limit)
+    results = map_func(render, [job.source for job in jobs])
+    for job, (derivatives, error) in zip(jobs, results):
+        finish(job, derivatives, error)
+    return len(jobs)
+
+
+def enqueue_missing():
+    """
+    Постановка в очередь изображений публикаций без готовых копий или
+    без копий в части доступных форматов; у последних имеющиеся копии
+    выводятся до готовности новых.
+    """
+    count = 0
+    posts = Post.objects.exclude(image='').filter(
+        image_jobs__isnull=True
+    ).only('image', 'image_derivatives')
+    for post in posts.iterator():
+        if images.derivatives_outdated(post):
+            ImageJob.objects.create(post_id=post.pk, source=post.image.name)
+            count += 1
+        elif not images.derivatives_ready(post) and enqueue(post, force=True):
+            count += 1
+    return count
@@ -0,0 +1,59 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Изготавливает уменьшенные копии изображений публикаций из '
+        'очереди заданий в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов-обработчиков.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help='Число заданий, захватываемых за один раз.'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, ожидая новые задания; без этого '
+                 'команда завершается, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=5,
+            help='Пауза при пустой очереди в секундах.'
+        )
+        parser.add_argument(
+            '--enqueue-missing', action='store_true',
+            help='Поставить в очередь изображения без готовых копий.'
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue_missing']:
+            enqueued = jobs.enqueue_missing()
+            if options['verbosity'] > 0:
+                self.stdout.write(f'Поставлено в очередь: {enqueued}')
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=django.setup
+        ) as executor:
+            while True:
+                done = jobs.run_pending(options['batch_size'], executor.map)
+                if done and options['verbosity'] > 0:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Обработано изображений: {done}'
+                    ))
+                if not done:
+                    if not options['loop']:
+                        return
+                    time.sleep(options['sleep'])
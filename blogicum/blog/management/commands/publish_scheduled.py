@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from blog import feed
+
+
+class Command(BaseCommand):
+    help = (
+        'Публикует отложенные посты, дата публикации которых наступила, '
+        'и сбрасывает кеш затронутых страниц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, просыпаясь к дате следующей публикации.'
+        )
+        parser.add_argument(
+            '--max-sleep', type=float, default=60,
+            help='Наибольшая пауза между проверками в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            published = feed.publish_due()
+            if published and options['verbosity'] > 0:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Опубликовано отложенных постов: {published}'
+                ))
+            if not options['loop']:
+                return
+            time.sleep(self.get_sleep_seconds(options['max_sleep']))
+
+    @staticmethod
+    def get_sleep_seconds(max_sleep):
+        next_pub_date = feed.get_next_pub_date()
+        if next_pub_date is None:
+            return max_sleep
+        seconds = (next_pub_date - now()).total_seconds()
+        return min(max(seconds, 0.1), max_sleep)
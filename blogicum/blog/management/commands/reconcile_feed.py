@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from blog import feed
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет материализованную ленту с публикациями и исправляет '
+        'расхождения. Предназначена для периодического запуска.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted, created, updated = feed.reconcile(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Лента сверена: удалено {deleted}, добавлено {created}, '
+            f'обновлено {updated}'
+        ))
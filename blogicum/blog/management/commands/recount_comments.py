@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённое количество комментариев публикаций.'
+
+    def handle(self, *args, **options):
+        actual = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(
+            total=Count('pk')
+        ).values('total')
+        posts = Post.objects.annotate(
+            actual_count=Coalesce(Subquery(actual), 0)
+        ).exclude(comment_count=F('actual_count'))
+        repaired = posts.update(comment_count=Coalesce(Subquery(actual), 0))
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков комментариев: {repaired}'
+        ))
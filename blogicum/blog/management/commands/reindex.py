@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает поисковый индекс публикаций целиком. Публикации '
+        'читаются потоком и индексируются пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Число публикаций в одной пачке.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        removed = search.remove_missing()
+        total = 0
+        for count in search.reindex(options['batch_size']):
+            total += count
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Проиндексировано: {total}')
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс перестроен: публикаций {total}, удалено строк '
+            f'{removed}, за {elapsed:.2f} с ({rate:.0f} публикаций/с)'
+        ))
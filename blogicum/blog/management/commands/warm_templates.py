@@ -0,0 +1,52 @@
+from pathlib import Path
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.utils import get_app_template_dirs
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее разбирает шаблоны проекта, чтобы кеширующий загрузчик '
+        'не тратил время на первый запрос, и выводит время компиляции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--app-dirs', action='store_true',
+            help='Также разобрать шаблоны из каталогов приложений.'
+        )
+
+    def get_template_names(self, engine, app_dirs):
+        template_dirs = list(engine.dirs)
+        if app_dirs:
+            template_dirs += get_app_template_dirs('templates')
+        for template_dir in map(Path, template_dirs):
+            for path in sorted(template_dir.rglob('*.html')):
+                yield path.relative_to(template_dir).as_posix()
+
+    def handle(self, *args, **options):
+        for engine in engines.all():
+            if not isinstance(engine, DjangoTemplates):
+                continue
+            timings = {}
+            for name in self.get_template_names(engine, options['app_dirs']):
+                started = perf_counter()
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError as error:
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                timings[name] = perf_counter() - started
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'{name}: {timings[name] * 1000:.2f} мс'
+                    )
+            if options['verbosity'] < 1:
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'{engine.name}: разобрано шаблонов {len(timings)} '
+                f'за {sum(timings.values()) * 1000:.2f} мс'
+            ))
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.16 on 2026-10-18 03:22
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def fill_updated_at(apps, schema_editor):
+    for name in ('Category', 'Location'):
+        apps.get_model('blog', name).objects.update(
+            updated_at=F('created_at')
+        )
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    last_comment = Comment.objects.filter(
+        post=OuterRef('pk')
+    ).order_by('-created_at').values('created_at')[:1]
+    Post.objects.update(updated_at=Greatest(
+        'created_at', Coalesce(Subquery(last_comment), 'created_at')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+SEARCH_TABLE = 'blog_post_search'
+IS_VISIBLE = (
+    'EXISTS (SELECT 1 FROM blog_feedentry f WHERE f.post_id = p.id)'
+)
+
+
+def create_sqlite(cursor):
+    try:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5('
+            'title, text, is_visible UNINDEXED, '
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:
+        # SQLite собран без FTS5: поиск работает по вхождению строки.
+        return
+    cursor.execute(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, title, text, is_visible) '
+        f'SELECT p.id, p.title, p.text, {IS_VISIBLE} FROM blog_post p'
+    )
+
+
+def create_postgresql(cursor):
+    cursor.execute(
+        f'CREATE TABLE {SEARCH_TABLE} ('
+        'post_id bigint PRIMARY KEY '
+        'REFERENCES blog_post (id) ON DELETE CASCADE, '
+        'is_visible boolean NOT NULL, '
+        'document tsvector NOT NULL)'
+    )
+    cursor.execute(
+        f'CREATE INDEX {SEARCH_TABLE}_document_idx '
+        f'ON {SEARCH_TABLE} USING GIN (document)'
+    )
+    cursor.execute(
+        f'INSERT INTO {SEARCH_TABLE} (post_id, is_visible, document) '
+        f'SELECT p.id, {IS_VISIBLE}, '
+        "setweight(to_tsvector('russian', p.title), 'A') || "
+        "setweight(to_tsvector('russian', p.text), 'B') FROM blog_post p"
+    )
+
+
+def create_search_table(apps, schema_editor):
+    create = {
+        'sqlite': create_sqlite,
+        'postgresql': create_postgresql,
+    }.get(schema_editor.connection.vendor)
+    if create is not None:
+        with schema_editor.connection.cursor() as cursor:
+            create(cursor)
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_image_content_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.utils import timezone
+
+SEARCH_TABLE = 'blog_post_search'
+SEARCH_KEY = {'sqlite': 'rowid', 'postgresql': 'post_id'}
+
+
+def drop_scheduled_entries(apps, schema_editor):
+    """
+    Первая версия 0006 переносила в ленту и посты с датой публикации в
+    будущем. Их строки удаляются, а в поисковом индексе посты
+    становятся невидимыми до публикации командой publish_scheduled.
+    """
+    FeedEntry = apps.get_model('blog', 'FeedEntry')
+    scheduled = FeedEntry.objects.filter(pub_date__gt=timezone.now())
+    ids = list(scheduled.values_list('post_id', flat=True))
+    if not ids:
+        return
+    scheduled.delete()
+    connection = schema_editor.connection
+    key = SEARCH_KEY.get(connection.vendor)
+    if key is None or SEARCH_TABLE not in (
+            connection.introspection.table_names()):
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {SEARCH_TABLE} SET is_visible = %s WHERE {key} = %s',
+            [(False, pk) for pk in ids]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_post_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            drop_scheduled_entries, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def enqueue_existing_images(apps, schema_editor):
+    """
+    Изображения, загруженные до появления копий, ставятся в очередь
+    команды process_images. До готовности копий выводится оригинал.
+    """
+    Post = apps.get_model('blog', 'Post')
+    ImageJob = apps.get_model('blog', 'ImageJob')
+    posts = Post.objects.exclude(image='').filter(
+        image_jobs__isnull=True
+    ).values_list('pk', 'image', 'image_derivatives')
+    ImageJob.objects.bulk_create(
+        (
+            ImageJob(post_id=pk, source=image)
+            for pk, image, derivatives in posts.iterator()
+            if not derivatives
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_drop_scheduled_feed_entries'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            enqueue_existing_images, migrations.RunPython.noop
+        ),
+    ]
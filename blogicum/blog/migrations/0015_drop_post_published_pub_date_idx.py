@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:01
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_enqueue_existing_images'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_published_pub_date_idx',
+        ),
+    ]
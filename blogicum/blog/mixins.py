@@ -1,11 +1,21 @@
+from calendar import timegm
+from datetime import datetime, timezone
+from hashlib import md5
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
-from django.utils.timezone import now
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
+from .cache import (get_changed_at, get_generations, get_page_cache_key,
+                    make_key)
 from .forms import CommentForm, PostForm
-from .models import Post, Comment
+from .models import Comment, FeedEntry, Post, last_modified
+from .paginators import CursorPaginator, InvalidCursor, LeanCountPaginator
 
 
 class OnlyAuthorCommentMixin(LoginRequiredMixin):
@@ -19,14 +29,16 @@ class OnlyAuthorCommentMixin(LoginRequiredMixin):
         return reverse('blog:post_detail',
                        kwargs={'post_id': self.kwargs['post_id']})
 
-    def get_object(self):
-        return get_object_or_404(
-            Comment.objects.filter(post=self.kwargs['post_id']),
-            pk=self.kwargs['comment_id']
-        )
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_object'):
+            self._object = get_object_or_404(
+                Comment.objects.filter(post=self.kwargs['post_id']),
+                pk=self.kwargs['comment_id']
+            )
+        return self._object
 
     def dispatch(self, request, *args, **kwargs):
-        if self.get_object().author != request.user:
+        if self.get_object().author_id != request.user.pk:
             return redirect('blog:post_detail',
                             post_id=self.kwargs['post_id'])
         return super().dispatch(request, *args, **kwargs)
@@ -40,9 +52,13 @@ class OnlyAuthorPostMixin(LoginRequiredMixin):
     pk_url_kwarg = 'post_id'
     template_name = 'blog/create.html'
 
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_object'):
+            self._object = super().get_object(queryset)
+        return self._object
+
     def dispatch(self, request, *args, **kwargs):
-        post = get_object_or_404(Post, pk=self.kwargs[self.pk_url_kwarg])
-        if post.author != self.request.user:
+        if self.get_object().author_id != request.user.pk:
             return redirect('blog:post_detail',
                             post_id=self.kwargs[self.pk_url_kwarg])
         return super().dispatch(request, *args, **kwargs)
@@ -51,18 +67,242 @@ class OnlyAuthorPostMixin(LoginRequiredMixin):
 class PublishedMixin:
     """
     Миксин представления только опубликованных постов на текущий момент
-    времени, в том числе подсчет количества комментариев к публикациям.
+    времени. Посты выбираются из материализованной ленты FeedEntry, в
+    контекст страницы передаются сами публикации.
     """
 
+    def get_published_posts(self):
+        """Строки ленты опубликованных постов без связанных моделей."""
+        return FeedEntry.objects.all()
+
     def get_queryset(self):
-        return Post.objects.prefetch_related(
-            'author', 'location', 'category'
-        ).filter(
-            pub_date__lt=now(),
-            is_published=True,
-            category__is_published=True,
-        ).order_by(
-            '-pub_date'
-        ).annotate(
-            comment_count=Count('comments')
+        return self.get_published_posts().with_posts().order_by('-pub_date')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        if page is not None and self.object_list.model is FeedEntry:
+            page.object_list = [entry.post for entry in page.object_list]
+        return context
+
+
+class CursorPaginationMixin:
+    """
+    Миксин постраничного вывода по курсору вместо номера страницы.
+    Включается настройкой CURSOR_PAGINATION или параметром ?after=.
+    """
+
+    cursor_kwarg = 'after'
+    cursor_ordering = ('-pub_date', '-pk')
+
+    def use_cursor_pagination(self):
+        return (settings.CURSOR_PAGINATION
+                or self.cursor_kwarg in self.request.GET)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size,
+                                    self.cursor_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404('Неверный курсор страницы.')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class LeanCountPaginationMixin:
+    """
+    Миксин подсчёта страниц по облегчённой выборке: COUNT(*) выполняется
+    без аннотаций и JOIN комментариев, а его результат может кешироваться.
+    """
+
+    paginator_class = LeanCountPaginator
+
+    def get_count_queryset(self):
+        return None
+
+    def get_count_cache_key(self):
+        return None
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        count_cache_key = self.get_count_cache_key()
+        if count_cache_key and settings.POSTS_COUNT_CACHE_TIMEOUT:
+            count_cache_key = make_key('count', ('feed',), count_cache_key)
+        return super().get_paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            count_queryset=self.get_count_queryset(),
+            count_cache_key=count_cache_key,
+            count_cache_timeout=settings.POSTS_COUNT_CACHE_TIMEOUT,
+            **kwargs
+        )
+
+
+class CacheScopesMixin:
+    """Миксин областей кеша, от которых зависит содержимое страницы."""
+
+    cache_scopes = ('feed',)
+
+    def get_cache_scopes(self):
+        """Области кеша, при сбросе которых страница устаревает."""
+        return self.cache_scopes
+
+
+class ConditionalGetMixin(CacheScopesMixin):
+    """
+    Миксин условных GET-запросов. ETag строится по поколениям областей
+    кеша страницы и пользователю, Last-Modified — по наибольшему
+    updated_at выводимых объектов и времени последнего сброса областей
+    кеша, которое меняется и при удалении объектов. Если страница не
+    изменилась, ответ 304 отдаётся без выборки публикаций и отрисовки
+    шаблона.
+    """
+
+    def check_access(self):
+        """
+        Проверка доступа к странице до ответа 304: вызывает Http404,
+        если страница недоступна пользователю.
+        """
+
+    def get_last_modified_sources(self):
+        """
+        Выборки max_updated(), наибольшее значение которых считается
+        временем последнего изменения страницы.
+        """
+        return ()
+
+    def get_etag(self):
+        """
+        Значение ETag страницы. В него входит и CSRF-cookie: после смены
+        токена, например при повторном входе, форма на странице
+        устаревает.
+        """
+        generations = get_generations(self.get_cache_scopes())
+        raw = ':'.join((
+            self.request.get_full_path(),
+            str(self.request.user.pk),
+            self.request.META.get('CSRF_COOKIE', ''),
+            *(str(generations[scope]) for scope in generations),
+        ))
+        return f'W/"{md5(raw.encode()).hexdigest()}"'
+
+    def _get_last_modified(self):
+        changed_at = datetime.fromtimestamp(
+            get_changed_at(self.get_cache_scopes()), timezone.utc
+        )
+        updated_at = last_modified(*self.get_last_modified_sources())
+        return max(filter(None, (updated_at, changed_at)))
+
+    def get_last_modified(self):
+        """
+        Время последнего изменения страницы. Хранится в кеше под ключом
+        с поколениями её областей, так что пересчитывается одним
+        запросом UNION ALL только после изменений.
+        """
+        path = md5(self.request.path.encode()).hexdigest()
+        key = make_key('modified', self.get_cache_scopes(), path)
+        return cache.get_or_set(key, self._get_last_modified,
+                                settings.PAGE_CACHE_TIMEOUT)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        self.check_access()
+        etag = self.get_etag()
+        last_modified = self.get_last_modified()
+        timestamp = last_modified and timegm(last_modified.utctimetuple())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is not None:
+            return self.patch_cache_control(response)
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+
+        def patch_csrf_validators(response):
+            # Смену CSRF-токена отражает только ETag. Токен мог быть
+            # выдан при отрисовке, поэтому ETag вычисляется заново.
+            if request.META.get('CSRF_COOKIE_USED'):
+                response['ETag'] = self.get_etag()
+                del response['Last-Modified']
+
+        if getattr(response, 'is_rendered', True):
+            patch_csrf_validators(response)
+        else:
+            response.add_post_render_callback(patch_csrf_validators)
+        return self.patch_cache_control(response)
+
+    def patch_cache_control(self, response):
+        """
+        Браузер и промежуточные кеши проверяют страницу при каждом
+        запросе; страницы пользователей хранятся только в браузере.
+        """
+        if self.request.user.is_authenticated:
+            patch_cache_control(response, no_cache=True, private=True)
+        else:
+            patch_cache_control(response, no_cache=True)
+        return response
+
+
+class AnonymousPageCacheMixin(CacheScopesMixin):
+    """
+    Миксин кеширования страниц целиком для анонимных читателей: в кеше
+    хранятся содержимое и заголовки ответа, но не cookie. Страницы с
+    CSRF-токеном и ответы кроме 200 OK не кешируются.
+    """
+
+    page_cache_timeout = settings.PAGE_CACHE_TIMEOUT
+
+    def dispatch(self, request, *args, **kwargs):
+        if (not self.page_cache_timeout or request.method != 'GET'
+                or request.user.is_authenticated):
+            return super().dispatch(request, *args, **kwargs)
+        key = get_page_cache_key(request, self.get_cache_scopes())
+        cached = cache.get(key)
+        if cached is not None:
+            content, headers = cached
+            response = HttpResponse(content)
+            for header, value in headers:
+                response[header] = value
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+
+        def store(response):
+            if (response.status_code == 200
+                    and not request.META.get('CSRF_COOKIE_USED')):
+                cache.set(key, (response.content, list(response.items())),
+                          self.page_cache_timeout)
+
+        if getattr(response, 'is_rendered', True):
+            store(response)
+        else:
+            response.add_post_render_callback(store)
+        return response
+
+
+class CommentsPaginationMixin:
+    """Миксин вывода комментариев публикации порциями по курсору."""
+
+    comments_ordering = ('created_at', 'pk')
+
+    def get_comments_page(self, post, cursor=None, through=False):
+        """
+        Порция комментариев после курсора, а при through=True — все
+        комментарии с первого до конца этой порции.
+        """
+        paginator = CursorPaginator(
+            post.comments.select_related('author'),
+            settings.SHOW_COMMENTS,
+            self.comments_ordering
         )
+        try:
+            if through:
+                return paginator.page_through(cursor)
+            return paginator.page(cursor)
+        except InvalidCursor:
+            raise Http404('Неверный курсор комментариев.')
@@ -1,15 +1,53 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import (BooleanField, ExpressionWrapper, IntegerField,
+                              Max, Q, Value)
 from django.urls import reverse
 
+from .storage import ContentHashStorage
+
 User = get_user_model()
 
 
+class UpdatedQuerySet(models.QuerySet):
+    """Выборки по дате изменения объектов."""
+
+    def changed_since(self, moment, field='updated_at'):
+        """Объекты, изменённые позже moment."""
+        return self.filter(**{f'{field}__gt': moment})
+
+    def max_updated(self, field='updated_at'):
+        """
+        Выборка из одной строки с наибольшим значением поля. Такие
+        выборки разных моделей объединяются через union() в один запрос.
+        """
+        return self.order_by().annotate(
+            _all=Value(1, output_field=IntegerField())
+        ).values('_all').annotate(
+            latest=Max(field)
+        ).values_list('latest', flat=True)
+
+    def last_modified(self, field='updated_at'):
+        """Дата последнего изменения объектов выборки или None."""
+        return self.order_by().aggregate(latest=Max(field))['latest']
+
+
+def last_modified(*querysets):
+    """
+    Наибольшая дата среди выборок max_updated() одним запросом
+    UNION ALL или None.
+    """
+    if not querysets:
+        return None
+    dates = querysets[0].union(*querysets[1:], all=True)
+    return max(filter(None, dates), default=None)
+
+
 class BaseModel(models.Model):
     """
     Абстрактная модель.
-    Добавляет поля - флаг и дата создания публикации.
+    Добавляет поля - флаг, дата создания и дата изменения публикации.
     """
 
     is_published = models.BooleanField(
@@ -21,6 +59,13 @@ class BaseModel(models.Model):
         auto_now_add=True,
         verbose_name='Добавлено'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Изменено'
+    )
+
+    objects = UpdatedQuerySet.as_manager()
 
     class Meta:
         abstract = True
@@ -62,6 +107,66 @@ class Location(BaseModel):
         return self.name
 
 
+class PublishedPostQuerySet(UpdatedQuerySet):
+    """Выборки публикаций для лент и страниц блога."""
+
+    card_fields = (
+        'title',
+        'text',
+        'pub_date',
+        'is_published',
+        'image',
+        'image_derivatives',
+        'comment_count',
+        'author__username',
+        'location__name',
+        'location__is_published',
+        'category__title',
+        'category__slug',
+        'category__is_published',
+    )
+
+    @staticmethod
+    def published_condition():
+        """
+        Условие публикации поста: пост есть в материализованной ленте.
+        Посты с датой публикации в будущем попадают в неё командой
+        publish_scheduled, поэтому результат не меняется со временем сам
+        по себе и может долго храниться в кеше.
+        """
+        return Q(feed_entry__isnull=False)
+
+    def published(self):
+        """Опубликованные на текущий момент посты."""
+        return self.filter(self.published_condition())
+
+    def visible_to(self, user):
+        """Посты, страницы которых доступны пользователю."""
+        return self.filter(
+            self.published_condition() | Q(author_id=user.pk)
+        )
+
+    def with_visibility(self):
+        """
+        Все посты со связанными моделями и признаком is_visible: страница
+        поста и проверка доступа к ней обходятся одним запросом.
+        """
+        return self.select_related(
+            'author', 'location', 'category'
+        ).annotate(is_visible=ExpressionWrapper(
+            self.published_condition(), output_field=BooleanField()
+        ))
+
+    def for_cards(self):
+        """
+        Одним запросом с JOIN выбирает только поля, которые выводит
+        карточка публикации includes/post_card.html.
+        """
+        return self.select_related(
+            'author', 'location', 'category'
+        ).only(*self.card_fields)
+
+
 class Post(BaseModel):
     """Модель таблицы публикации."""
 
@@ -95,12 +200,41 @@ class Post(BaseModel):
     )
     image = models.ImageField(
         'Изображение публикации',
-        blank=True, upload_to='blog_images')
+        blank=True, upload_to='blog_images', db_index=True,
+        storage=ContentHashStorage())
+    image_derivatives = models.JSONField(
+        'Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+        editable=False
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = PublishedPostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date', 'title')
+        indexes = (
+            models.Index(
+                fields=('-pub_date',),
+                condition=Q(is_published=True),
+                name='post_feed_partial_idx'
+            ),
+            models.Index(
+                fields=('category', 'is_published', '-pub_date'),
+                name='post_category_feed_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title
@@ -129,5 +263,128 @@ class Comment(models.Model):
     class Meta:
         ordering = ('created_at',)
         default_related_name = 'comments'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_at_idx'
+            ),
+        )
         verbose_name = 'комментарий'
         verbose_name_plural = 'комментарии'
+
+
+class FeedEntryQuerySet(UpdatedQuerySet):
+    """Выборки материализованной ленты."""
+
+    def with_posts(self):
+        """Строки ленты вместе с полями карточек их публикаций."""
+        return self.select_related(
+            'post__author', 'post__location', 'post__category'
+        ).only(
+            'pub_date',
+            *(f'post__{field}' for field in PublishedPostQuerySet.card_fields)
+        )
+
+
+class FeedEntry(models.Model):
+    """
+    Материализованная лента: узкая таблица опубликованных постов
+    опубликованных категорий, дата публикации которых наступила.
+    Поддерживается сигналами моделей и командами reconcile_feed
+    и publish_scheduled.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_entry',
+        verbose_name='Публикация'
+    )
+    pub_date = models.DateTimeField('Дата и время публикации')
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Категория'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор публикации'
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0
+    )
+
+    objects = FeedEntryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('-pub_date',), name='feed_pub_date_idx'),
+            models.Index(
+                fields=('category', '-pub_date'),
+                name='feed_category_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='feed_author_pub_date_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.post_id}: {self.pub_date}'
+
+
+class ImageJob(models.Model):
+    """
+    Задание на изготовление уменьшенных копий изображения публикации.
+    Очередь хранится в базе данных и разбирается командой process_images.
+    Выполненные задания удаляются.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Публикация'
+    )
+    source = models.CharField('Изображение', max_length=255)
+    status = models.CharField(
+        'Состояние',
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    started_at = models.DateTimeField('Начато', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'обработка изображения'
+        verbose_name_plural = 'Обработка изображений'
+        ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('status', 'created_at'),
+                name='imagejob_status_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.post_id}: {self.source} ({self.status})'
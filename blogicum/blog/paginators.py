@@ -0,0 +1,183 @@
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections.abc import Sequence
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    """Курсор страницы повреждён или не подходит к выборке."""
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    Кодировщик значений курсора. DjangoJSONEncoder сокращает время до
+    миллисекунд, и условие по ключу сортировки сравнивало бы записи с
+    усечённым значением, поэтому дата и время кодируются целиком.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorPage(Sequence):
+    """Страница выборки, полученная по курсору."""
+
+    by_cursor = True
+
+    def __init__(self, object_list, paginator, cursor, next_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    def __repr__(self):
+        return f'<CursorPage after {self.cursor!r}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return bool(self.cursor)
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+
+class CursorPaginator:
+    """
+    Keyset-пагинация: страница выбирается условием по ключу сортировки
+    последней записи предыдущей страницы, а не смещением OFFSET.
+    Стоимость любой страницы равна стоимости первой, подсчёт COUNT(*)
+    не выполняется.
+    """
+
+    def __init__(self, object_list, per_page, ordering):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    @staticmethod
+    def _field_name(order):
+        return order.lstrip('-')
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, self._field_name(order))
+                  for order in self.ordering]
+        raw = json.dumps(values, cls=CursorJSONEncoder).encode()
+        return urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw)
+        except (BinasciiError, ValueError):
+            raise InvalidCursor(cursor)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        return values
+
+    def get_keyset_filter(self, values):
+        """
+        Условие «строго после курсора» для составного ключа сортировки:
+        (a > x) OR (a = x AND b > y) OR ...
+        """
+        keyset = Q()
+        equal = {}
+        for order, value in zip(self.ordering, values):
+            name = self._field_name(order)
+            lookup = 'lt' if order.startswith('-') else 'gt'
+            keyset |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return keyset
+
+    def page(self, cursor=None):
+        queryset = self.object_list.order_by(*self.ordering)
+        if cursor:
+            values = self.decode_cursor(cursor)
+            try:
+                queryset = queryset.filter(self.get_keyset_filter(values))
+            except (ValidationError, TypeError, ValueError):
+                raise InvalidCursor(cursor)
+        object_list = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(object_list) > self.per_page:
+            object_list = object_list[:self.per_page]
+            next_cursor = self.encode_cursor(object_list[-1])
+        return CursorPage(object_list, self, cursor, next_cursor)
+
+    def page_through(self, cursor=None):
+        """
+        Все записи от начала выборки до конца страницы после курсора
+        включительно, например для вывода без JavaScript.
+        """
+        page = self.page(cursor)
+        if cursor:
+            earlier = self.object_list.order_by(*self.ordering).exclude(
+                self.get_keyset_filter(self.decode_cursor(cursor))
+            )
+            page.object_list = list(earlier) + page.object_list
+        return page
+
+
+class ElidedPage(Page):
+    """Страница со свёрнутым списком номеров соседних страниц."""
+
+    @cached_property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(
+            self.number,
+            on_each_side=self.paginator.on_each_side,
+            on_ends=self.paginator.on_ends
+        )
+
+
+class LeanCountPaginator(Paginator):
+    """
+    Пагинатор, считающий записи по облегчённой выборке без аннотаций
+    и сортировки. При заданном ключе число записей кешируется на
+    count_cache_timeout секунд. Страницы выводят не все номера, а лишь
+    первые, последние и соседние с текущей.
+    """
+
+    on_each_side = 2
+    on_ends = 1
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, count_queryset=None,
+                 count_cache_key=None, count_cache_timeout=0):
+        super().__init__(object_list, per_page, orphans,
+                         allow_empty_first_page)
+        self.count_queryset = count_queryset
+        self.count_cache_key = count_cache_key
+        self.count_cache_timeout = count_cache_timeout
+
+    def _get_page(self, *args, **kwargs):
+        return ElidedPage(*args, **kwargs)
+
+    def _count(self):
+        if self.count_queryset is None:
+            return Paginator.count.func(self)
+        return self.count_queryset.order_by().count()
+
+    @cached_property
+    def count(self):
+        if not (self.count_cache_key and self.count_cache_timeout):
+            return self._count()
+        return cache.get_or_set(self.count_cache_key, self._count,
+                                self.count_cache_timeout)
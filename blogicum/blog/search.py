@@ -0,0 +1,277 @@
+import re
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.expressions import RawSQL
+
+from .models import FeedEntry, Post
+
+SEARCH_TABLE = 'blog_post_search'
+WORD_RE = re.compile(r'\w+')
+
+
+def get_words(query):
+    return WORD_RE.findall(query.lower())
+
+
+def with_visibility(posts):
+    """Признак видимости поста в публичном поиске — наличие в ленте."""
+    return posts.annotate(
+        is_visible=Exists(FeedEntry.objects.filter(post=OuterRef('pk')))
+    )
+
+
+def get_index_rows(posts):
+    """Строки индекса: id, заголовок, текст и признак видимости."""
+    return with_visibility(posts).values_list(
+        'pk', 'title', 'text', 'is_visible'
+    )
+
+
+class SQLiteSearch:
+    """
+    Полнотекстовый индекс в виртуальной таблице FTS5. Русского
+    стеммера в FTS5 нет, поэтому слова запроса ищутся по префиксу.
+    """
+
+    @staticmethod
+    def get_match(words):
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def search(self, words, visible_only, limit):
+        visible = 'AND is_visible = 1' if visible_only else ''
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s {visible} '
+                f'ORDER BY bm25({SEARCH_TABLE}, 10.0, 1.0) LIMIT %s',
+                [self.get_match(words), limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def filter(self, posts, words, visible_only):
+        visible = 'AND is_visible = 1' if visible_only else ''
+        return posts.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s {visible}',
+            [self.get_match(words)]
+        ))
+
+    def remove(self, ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+                [(pk,) for pk in ids]
+            )
+
+    def set_visibility(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {SEARCH_TABLE} SET is_visible = %s WHERE rowid = %s',
+                [(is_visible, pk) for pk, is_visible in rows]
+            )
+
+    def remove_missing(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} '
+                'WHERE rowid NOT IN (SELECT id FROM blog_post)'
+            )
+            return cursor.rowcount
+
+    def index(self, rows):
+        rows = list(rows)
+        self.remove(row[0] for row in rows)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, text, is_visible) '
+                'VALUES (%s, %s, %s, %s)',
+                rows
+            )
+
+
+class PostgreSQLSearch:
+    """
+    Полнотекстовый индекс в столбце tsvector с GIN-индексом; слова
+    приводятся к основе конфигурацией SEARCH_POSTGRES_CONFIG.
+    """
+
+    def search(self, words, visible_only, limit):
+        visible = 'AND is_visible' if visible_only else ''
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM {SEARCH_TABLE}, '
+                'plainto_tsquery(%s::regconfig, %s) query '
+                f'WHERE document @@ query {visible} '
+                'ORDER BY ts_rank(document, query) DESC LIMIT %s',
+                [settings.SEARCH_POSTGRES_CONFIG, ' '.join(words), limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def filter(self, posts, words, visible_only):
+        visible = 'AND is_visible' if visible_only else ''
+        return posts.filter(pk__in=RawSQL(
+            f'SELECT post_id FROM {SEARCH_TABLE} '
+            'WHERE document @@ plainto_tsquery(%s::regconfig, %s) '
+            f'{visible}',
+            [settings.SEARCH_POSTGRES_CONFIG, ' '.join(words)]
+        ))
+
+    def remove(self, ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE post_id = ANY(%s)',
+                [list(ids)]
+            )
+
+    def set_visibility(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {SEARCH_TABLE} SET is_visible = %s '
+                'WHERE post_id = %s',
+                [(is_visible, pk) for pk, is_visible in rows]
+            )
+
+    def remove_missing(self):
+        # Строки удалённых постов удаляет внешний ключ ON DELETE CASCADE.
+        return 0
+
+    def index(self, rows):
+        config = settings.SEARCH_POSTGRES_CONFIG
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (post_id, is_visible, document) '
+                "VALUES (%s, %s, setweight(to_tsvector(%s::regconfig, %s), "
+                "'A') || setweight(to_tsvector(%s::regconfig, %s), 'B')) "
+                'ON CONFLICT (post_id) DO UPDATE SET '
+                'is_visible = EXCLUDED.is_visible, '
+                'document = EXCLUDED.document',
+                [(pk, is_visible, config, title, config, text)
+                 for pk, title, text, is_visible in rows]
+            )
+
+
+class DatabaseSearch:
+    """Поиск по вхождению строки для баз данных без индекса."""
+
+    def search(self, words, visible_only, limit):
+        posts = self.filter(Post.objects.all(), words, visible_only)
+        return list(posts.order_by('-pub_date').values_list(
+            'pk', flat=True
+        )[:limit])
+
+    def filter(self, posts, words, visible_only):
+        condition = Q()
+        for word in words:
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        posts = posts.filter(condition)
+        if visible_only:
+            posts = posts.published()
+        return posts
+
+    def remove(self, ids):
+        pass
+
+    def set_visibility(self, rows):
+        pass
+
+    def remove_missing(self):
+        return 0
+
+    def index(self, rows):
+        pass
+
+
+BACKENDS = {'sqlite': SQLiteSearch, 'postgresql': PostgreSQLSearch}
+
+
+def get_backend():
+    """Поисковый индекс базы данных или поиск по вхождению строки."""
+    backend = BACKENDS.get(connection.vendor)
+    if backend is None or not has_search_table():
+        return DatabaseSearch()
+    return backend()
+
+
+_search_tables = {}
+
+
+def has_search_table():
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _search_tables:
+        _search_tables[key] = (
+            SEARCH_TABLE in connection.introspection.table_names()
+        )
+    return _search_tables[key]
+
+
+def search(query, visible_only=True, limit=None):
+    """
+    Список id публикаций, подходящих под запрос, от наиболее
+    релевантных.
+    Без visible_only находятся и скрытые публикации — для админки.
+    """
+    words = get_words(query)
+    if not words:
+        return []
+    return get_backend().search(
+        words, visible_only, limit or settings.SEARCH_MAX_RESULTS
+    )
+
+
+def filter_posts(posts, query, visible_only=True):
+    """
+    Публикации выборки, подходящие под запрос, без ограничения
+    SEARCH_MAX_RESULTS и без сортировки по релевантности — для админки.
+    Условие строится подзапросом к индексу, а не списком id.
+    """
+    words = get_words(query)
+    if not words:
+        return posts.none()
+    return get_backend().filter(posts, words, visible_only)
+
+
+def index_posts(posts):
+    """Добавление или обновление публикаций выборки в индексе."""
+    get_backend().index(get_index_rows(posts))
+
+
+def remove_posts(ids):
+    """Удаление публикаций из индекса."""
+    get_backend().remove(ids)
+
+
+def update_visibility(posts):
+    """
+    Обновление признака видимости публикаций выборки без повторного
+    разбора их текста: после публикации по расписанию или изменения
+    флага публикации категории.
+    """
+    get_backend().set_visibility(
+        with_visibility(posts).values_list('pk', 'is_visible')
+    )
+
+
+def reindex(batch_size=1000):
+    """
+    Полная перестройка индекса: публикации читаются потоком через
+    iterator() и индексируются пачками по batch_size. После каждой
+    пачки отдаёт число проиндексированных в ней публикаций.
+    """
+    backend = get_backend()
+    rows = get_index_rows(Post.objects.order_by()).iterator(
+        chunk_size=batch_size
+    )
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        backend.index(batch)
+        yield len(batch)
+
+
+def remove_missing():
+    """Удаление из индекса строк удалённых публикаций."""
+    return get_backend().remove_missing()
@@ -0,0 +1,161 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from . import feed, images, jobs, search
+from .cache import registry
+from .models import Category, Comment, FeedEntry, Location, Post
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """
+    Увеличение счётчика комментариев публикации. Любое сохранение
+    комментария меняет и дату изменения публикации.
+    """
+    if not created:
+        Post.objects.filter(pk=instance.post_id).update(updated_at=now())
+        return
+    Post.objects.filter(pk=instance.post_id).update(
+        comment_count=F('comment_count') + 1, updated_at=now()
+    )
+    FeedEntry.objects.filter(pk=instance.post_id).update(
+        comment_count=F('comment_count') + 1
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """
+    Уменьшение счётчика комментариев публикации, в том числе при
+    каскадном удалении комментариев вместе с их автором.
+    """
+    Post.objects.filter(pk=instance.post_id).update(updated_at=now())
+    for model in (Post, FeedEntry):
+        model.objects.filter(
+            pk=instance.post_id, comment_count__gt=0
+        ).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=Post)
+def sync_post_feed_entry(sender, instance, **kwargs):
+    """Обновление строки материализованной ленты публикации."""
+    feed.sync_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """
+    Обновление строки поискового индекса публикации. Выполняется после
+    синхронизации ленты, от которой зависит видимость поста в поиске.
+    """
+    search.index_posts(Post.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_index(sender, instance, **kwargs):
+    """Удаление публикации из поискового индекса."""
+    search.remove_posts([instance.pk])
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_image(sender, instance, **kwargs):
+    """Имя файла изображения публикации до сохранения."""
+    instance._previous_image = instance.pk and Post.objects.filter(
+        pk=instance.pk
+    ).values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def enqueue_post_image_derivatives(sender, instance, **kwargs):
+    """Очередь на уменьшенные копии нового изображения публикации."""
+    jobs.enqueue(instance, previous=instance._previous_image)
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    """Освобождение изображения и его копий вместе с публикацией."""
+    images.release_image(
+        instance.image.storage, instance.image.name,
+        instance.image_derivatives or {}
+    )
+
+
+def publication_changed(category):
+    """Флаг публикации категории изменился при сохранении."""
+    return category._was_published != category.is_published
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_publication(sender, instance, **kwargs):
+    """Прежнее значение флага публикации категории."""
+    instance._was_published = instance.pk and Category.objects.filter(
+        pk=instance.pk
+    ).values_list('is_published', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+def sync_category_feed_entries(sender, instance, **kwargs):
+    """
+    Добавление или удаление строк ленты постов категории, если её флаг
+    публикации изменился.
+    """
+    if publication_changed(instance):
+        feed.sync_category(instance)
+
+
+@receiver(post_save, sender=Category)
+def update_category_posts_visibility(sender, instance, **kwargs):
+    """Видимость в поиске постов категории после изменения ленты."""
+    if publication_changed(instance):
+        search.update_visibility(Post.objects.filter(category=instance))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_posts(sender, instance, **kwargs):
+    """Посты удаляемой категории: её строки ленты удалятся каскадно."""
+    instance._post_ids = list(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def hide_deleted_category_posts(sender, instance, **kwargs):
+    """Посты удалённой категории скрываются в поиске."""
+    search.update_visibility(Post.objects.filter(pk__in=instance._post_ids))
+
+
+@registry.register(Post)
+def post_cache_scopes(post):
+    """Публикация видна в лентах, на своей странице и в профиле автора."""
+    return ('feed', f'post:{post.pk}', f'profile:{post.author_id}')
+
+
+@registry.register(Comment)
+def comment_cache_scopes(comment):
+    """Комментарий меняет страницу публикации и счётчик в лентах."""
+    return ('feed', f'post:{comment.post_id}')
+
+
+@registry.register(Category)
+def category_cache_scopes(category):
+    """Категория выводится в карточках и на страницах публикаций."""
+    return ('feed', 'taxonomy', f'category:{category.slug}')
+
+
+@registry.register(Location)
+def location_cache_scopes(location):
+    """Местоположение выводится в карточках и на страницах публикаций."""
+    return ('feed', 'taxonomy')
+
+
+@registry.register(User, ignore_fields=('last_login',))
+def user_cache_scopes(user):
+    """Имя автора выводится в карточках, комментариях и профиле."""
+    return ('feed', 'taxonomy', f'profile:{user.pk}')
+
+
+registry.connect()
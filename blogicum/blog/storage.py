@@ -0,0 +1,49 @@
+import hashlib
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentHashStorage(FileSystemStorage):
+    """
+    Хранилище с адресацией по содержимому: файл сохраняется под именем
+    из sha256 своего содержимого в каталогах по первым символам хеша,
+    blog_images/ab/cd/abcd….jpg. Одинаковые файлы хранятся один раз, а
+    повторная загрузка не пишет на диск и не перебирает свободные имена.
+    Копии, производные от хешированного файла (abcd…_640w.jpg),
+    сохраняются под своим именем рядом с ним методом save_derivative().
+    """
+
+    @staticmethod
+    def get_content_name(name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory, basename = posixpath.split(name)
+        extension = posixpath.splitext(basename)[1].lower()
+        return posixpath.join(
+            directory, digest[:2], digest[2:4], f'{digest}{extension}'
+        )
+
+    def _save_once(self, name, content, max_length=None):
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name.replace('\\', '/'), content)
+        return self._save_once(name, content, max_length)
+
+    def save_derivative(self, name, content, max_length=None):
+        """
+        Сохранение копии под именем, образованным от хешированного имени
+        оригинала. Имя однозначно определяет содержимое, поэтому
+        существующая копия не перезаписывается.
+        """
+        return self._save_once(name.replace('\\', '/'), content, max_length)
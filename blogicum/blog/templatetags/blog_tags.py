@@ -0,0 +1,91 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from blog.cache import get_generations
+from blog.images import derivatives_ready
+
+register = template.Library()
+
+
+@register.simple_tag
+def cached_post_cards(posts):
+    """
+    Отрисованные карточки публикаций. Карточка не зависит от читателя,
+    поэтому хранится в кеше под ключом из id публикации и поколений её
+    областей кеша; страница собирается одним get_many.
+    """
+    posts = list(posts)
+    scopes = [f'post:{post.pk}' for post in posts]
+    generations = get_generations([*scopes, 'taxonomy'])
+    keys = [
+        f'blog:card:{generations[scope]}.{generations["taxonomy"]}:{post.pk}'
+        for scope, post in zip(scopes, posts)
+    ]
+    cards = cache.get_many(keys)
+    missing = {}
+    card_template = get_template('includes/post_card.html')
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            missing[key] = card_template.render({'post': post})
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
+
+
+def get_srcset(storage, sizes):
+    """Атрибут srcset из имён файлов копий по их ширине."""
+    return ', '.join(
+        f'{storage.url(name)} {width}w'
+        for width, name in sorted(
+            sizes.items(), key=lambda item: int(item[0])
+        )
+    )
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, lazy=False):
+    """
+    Изображение публикации в <picture>: копии в современных форматах
+    предлагаются браузеру в порядке POST_IMAGE_MODERN_FORMATS, а по
+    ширине экрана он выбирает копию из srcset вместо оригинала. Пока
+    копии нового изображения не готовы, выводится заглушка. Оригинал
+    выводится, если изготовить копии не удалось, и для изображений,
+    загруженных до появления копий.
+    """
+    original = {'post': post, 'src': post.image.url, 'lazy': lazy}
+    if not post.image_derivatives:
+        return original
+    if not derivatives_ready(post):
+        return {'post': post, 'placeholder': True}
+    derivatives = post.image_derivatives
+    storage = post.image.storage
+    sizes = dict(derivatives['sizes'])
+    if derivatives.get('width'):
+        sizes[str(derivatives['width'])] = post.image.name
+    if not sizes:
+        return original
+    preference = [f'image/{image_format.lower()}'
+                  for image_format in settings.POST_IMAGE_MODERN_FORMATS]
+    formats = sorted(
+        derivatives.get('formats', {}).items(),
+        key=lambda item: (item[0] not in preference,
+                          item[0] in preference
+                          and preference.index(item[0]))
+    )
+    smallest = min(sizes, key=int)
+    return {
+        'post': post,
+        'src': storage.url(sizes[smallest]),
+        'srcset': get_srcset(storage, sizes) if len(sizes) > 1 else '',
+        'sources': [
+            {'type': mime, 'srcset': get_srcset(storage, format_sizes)}
+            for mime, format_sizes in formats if format_sizes
+        ],
+        'width': derivatives.get('width'),
+        'height': derivatives.get('height'),
+        'lazy': lazy,
+    }
@@ -11,6 +11,7 @@ urlpatterns = [
         views.PostDetailView.as_view(),
         name='post_detail'
     ),
+    path('search/', views.SearchView.as_view(), name='search'),
     path('category/<slug:category_slug>/', views.CategoryView.as_view(),
          name='category_posts'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
@@ -26,6 +27,8 @@ urlpatterns = [
     ),
     path('posts/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
+    path('posts/<int:post_id>/comments/',
+         views.PostCommentsView.as_view(), name='comments'),
     path('posts/<int:post_id>/edit_comment/<int:comment_id>',
          views.CommentUpdateView.as_view(), name='edit_comment'),
     path('posts/<int:post_id>/delete_comment/<int:comment_id>',
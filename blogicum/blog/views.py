@@ -2,73 +2,172 @@ from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
-from django.db.models import Count
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy, reverse
-from django.utils import timezone
+from django.utils.http import urlencode
 from django.views.generic import (CreateView, UpdateView, DetailView,
-                                  ListView, DeleteView)
+                                  ListView, DeleteView, View)
 
+from . import search
+from .cache import get_published_category, make_key
 from .forms import PostForm, CommentForm
-from .mixins import PublishedMixin, OnlyAuthorPostMixin, OnlyAuthorCommentMixin
-from .models import Post, Category
+from .mixins import (AnonymousPageCacheMixin, CommentsPaginationMixin,
+                     ConditionalGetMixin, CursorPaginationMixin,
+                     LeanCountPaginationMixin, PublishedMixin,
+                     OnlyAuthorPostMixin, OnlyAuthorCommentMixin)
+from .models import Category, FeedEntry, Location, Post
+from .paginators import LeanCountPaginator
 
 
-class IndexView(PublishedMixin, ListView):
+class IndexView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                CursorPaginationMixin, LeanCountPaginationMixin,
+                PublishedMixin, ListView):
     """Обработка запроса по адресу главной станицы."""
 
     model = Post
     template_name = 'blog/index.html'
     paginate_by = settings.SHOW_POSTS
 
+    def get_last_modified_sources(self):
+        return (
+            Post.objects.max_updated(),
+            FeedEntry.objects.max_updated('pub_date'),
+            Category.objects.max_updated(),
+            Location.objects.max_updated(),
+        )
+
+    def get_count_queryset(self):
+        return self.get_published_posts()
+
+    def get_count_cache_key(self):
+        return 'index'
 
-class PostDetailView(DetailView):
+
+class PostDetailView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                     CommentsPaginationMixin, DetailView):
     """Детализация поста"""
 
     pk_url_kwarg = 'post_id'
     model = Post
     template_name = 'blog/detail.html'
 
+    def get_cache_scopes(self):
+        return (f'post:{self.kwargs[self.pk_url_kwarg]}', 'taxonomy')
+
+    def check_access(self):
+        """
+        Автор и признак видимости поста хранятся в кеше под ключом с
+        поколениями областей страницы: ответ 304 не требует запросов к
+        базе, но скрытый пост по-прежнему доступен только автору.
+        """
+        key = make_key('access', self.get_cache_scopes())
+        access = cache.get(key)
+        if access is None:
+            post = self.get_object()
+            cache.set(key, (post.author_id, post.is_visible),
+                      settings.PAGE_CACHE_TIMEOUT)
+            return
+        author_id, is_visible = access
+        if author_id != self.request.user.pk and not is_visible:
+            raise Http404('Публикация не найдена.')
+
+    def get_last_modified_sources(self):
+        post_id = self.kwargs[self.pk_url_kwarg]
+        return (
+            Post.objects.filter(pk=post_id).max_updated(),
+            FeedEntry.objects.filter(pk=post_id).max_updated('pub_date'),
+            Category.objects.filter(posts=post_id).max_updated(),
+            Location.objects.filter(posts=post_id).max_updated(),
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = (
-            self.object.comments.select_related('author')
+        context['comments'] = self.get_comments_page(
+            self.object, self.request.GET.get('comments_after'), through=True
         )
         return context
 
     def get_object(self, queryset=None):
+        if not hasattr(self, '_object'):
+            post = get_object_or_404(
+                Post.objects.with_visibility(),
+                pk=self.kwargs[self.pk_url_kwarg]
+            )
+            if (post.author_id != self.request.user.pk
+                    and not post.is_visible):
+                raise Http404('Публикация не найдена.')
+            self._object = post
+        return self._object
+
+
+class PostCommentsView(CommentsPaginationMixin, View):
+    """Следующая порция комментариев публикации: HTML-фрагмент или JSON."""
+
+    def get(self, request, post_id):
         post = get_object_or_404(
-            Post, pk=self.kwargs[self.pk_url_kwarg]
+            Post.objects.visible_to(request.user).only('pk'), pk=post_id
         )
-        if post.author != self.request.user:
-            return get_object_or_404(
-                Post.objects.filter(
-                    pub_date__lt=timezone.now(),
-                    is_published=True,
-                    category__is_published=True,
-                ),
-                pk=self.kwargs[self.pk_url_kwarg],
-            )
-        return post
+        comments = self.get_comments_page(post, request.GET.get('after'))
+        html = render_to_string(
+            'includes/comment_list.html',
+            {'post': post, 'comments': comments},
+            request=request
+        )
+        if request.headers.get('Accept', '').startswith('application/json'):
+            return JsonResponse({
+                'html': html,
+                'next': comments.next_cursor,
+            })
+        return HttpResponse(html)
 
 
-class CategoryView(ListView):
+class CategoryView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                   CursorPaginationMixin, LeanCountPaginationMixin,
+                   PublishedMixin, ListView):
     """Страницы категории."""
 
     template_name = 'blog/category.html'
     paginate_by = settings.SHOW_POSTS
 
     def get_object(self):
-        return get_object_or_404(
-            Category.objects.filter(is_published=True),
-            slug=self.kwargs['category_slug']
-        )
+        if not hasattr(self, 'category'):
+            self.category = get_published_category(
+                self.kwargs['category_slug']
+            )
+        if self.category is None:
+            raise Http404('Категория не найдена.')
+        return self.category
 
     def get_queryset(self):
+        return super().get_queryset().filter(
+            category=self.get_object()
+        )
+
+    def get_count_queryset(self):
+        return self.get_published_posts().filter(category=self.get_object())
+
+    def get_count_cache_key(self):
+        return f'category:{self.kwargs["category_slug"]}'
+
+    def get_cache_scopes(self):
+        return ('feed', f'category:{self.kwargs["category_slug"]}')
+
+    def check_access(self):
+        self.get_object()
+
+    def get_last_modified_sources(self):
         category = self.get_object()
-        return PublishedMixin.get_queryset(self).filter(
-            category=category
+        return (
+            Post.objects.filter(category=category).max_updated(),
+            FeedEntry.objects.filter(
+                category=category
+            ).max_updated('pub_date'),
+            Category.objects.filter(pk=category.pk).max_updated(),
+            Location.objects.max_updated(),
         )
 
     def get_context_data(self, **kwargs):
@@ -77,6 +176,46 @@ class CategoryView(ListView):
         return context
 
 
+class SearchView(ConditionalGetMixin, AnonymousPageCacheMixin, ListView):
+    """
+    Полнотекстовый поиск опубликованных постов. Постранично выводятся
+    id из индекса, карточки выбираются только для текущей страницы.
+    """
+
+    template_name = 'blog/search.html'
+    paginate_by = settings.SHOW_POSTS
+    paginator_class = LeanCountPaginator
+    # Выдача меняется при изменении любой публикации, категории или
+    # местоположения, и все они сбрасывают ленту.
+    cache_scopes = ('feed', 'taxonomy')
+
+    def get_last_modified_sources(self):
+        return (
+            Post.objects.max_updated(),
+            FeedEntry.objects.max_updated('pub_date'),
+            Category.objects.max_updated(),
+            Location.objects.max_updated(),
+        )
+
+    def get_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_queryset(self):
+        return search.search(self.get_query())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context['page_obj']
+        posts = Post.objects.published().for_cards().in_bulk(
+            list(page.object_list)
+        )
+        page.object_list = [posts[pk] for pk in page.object_list
+                            if pk in posts]
+        context['query'] = self.get_query()
+        context['page_query'] = urlencode({'q': context['query']}) + '&'
+        return context
+
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     """Добавление новой публикации."""
 
@@ -103,35 +242,66 @@ class PostDeleteView(OnlyAuthorPostMixin, DeleteView):
     """Удаление публикации."""
 
     def get_context_data(self, **kwargs):
-        instance = get_object_or_404(Post, pk=self.kwargs[self.pk_url_kwarg])
         context = super().get_context_data(**kwargs)
-        form = PostForm(instance=instance)
-        context['form'] = form
+        context['form'] = PostForm(instance=self.object)
         return context
 
     success_url = reverse_lazy('blog:index')
 
 
-class Profile(ListView):
+class Profile(ConditionalGetMixin, LeanCountPaginationMixin, PublishedMixin,
+              ListView):
     """Страница профиля автора публикаций."""
 
     model = User
     template_name = 'blog/profile.html'
     paginate_by = settings.SHOW_POSTS
 
+    def get_author(self):
+        if not hasattr(self, 'author'):
+            self.author = get_object_or_404(
+                User, username=self.kwargs['username']
+            )
+        return self.author
+
+    def get_cache_scopes(self):
+        return ('feed', f'profile:{self.get_author().pk}')
+
+    def check_access(self):
+        self.get_author()
+
+    def get_last_modified_sources(self):
+        author = self.get_author()
+        return (
+            author.posts.max_updated(),
+            FeedEntry.objects.filter(
+                author=author
+            ).max_updated('pub_date'),
+            Category.objects.max_updated(),
+            Location.objects.max_updated(),
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['profile'] = self.author
         return context
 
     def get_queryset(self):
-        self.author = get_object_or_404(User, username=self.kwargs['username'])
-        posts = self.author.posts.select_related(
-            'author', 'location', 'category').order_by('-pub_date')
+        self.get_author()
+        posts = self.author.posts.for_cards().order_by('-pub_date')
+        if self.author != self.request.user:
+            return super().get_queryset().filter(author=self.author)
+        return posts
+
+    def get_count_queryset(self):
+        if self.author != self.request.user:
+            return self.get_published_posts().filter(author=self.author)
+        return self.author.posts.all()
+
+    def get_count_cache_key(self):
         if self.author != self.request.user:
-            return PublishedMixin.get_queryset(self.queryset
-                                               ).filter(author=self.author)
-        return posts.annotate(comment_count=Count('comments'))
+            return f'profile:{self.author.pk}'
+        return f'profile:{self.author.pk}:own'
 
 
 @login_required
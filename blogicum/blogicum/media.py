@@ -0,0 +1,116 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified, StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def get_byte_range(header, size):
+    """
+    Начало и конец (включительно) одного диапазона из заголовка Range,
+    None для заголовка, который следует игнорировать, или ValueError
+    для диапазона за пределами файла.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def stream_file(request, full_path, stat, content_type):
+    """
+    Отдача файла силами Django: целиком через FileResponse, которую
+    WSGI-сервер может передать в sendfile(), или частью по заголовку
+    Range.
+    """
+    header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if header and (not if_range or if_range == http_date(stat.st_mtime)):
+        try:
+            byte_range = get_byte_range(header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        if byte_range is not None:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(full_path, start, end - start + 1),
+                status=206, content_type=content_type
+            )
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            return response
+    return FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Выдача загруженных файлов без DEBUG. При MEDIA_ACCEL_REDIRECT или
+    MEDIA_SENDFILE_HEADER файл отдаёт веб-сервер по заголовку
+    X-Accel-Redirect (nginx) или X-Sendfile (Apache, lighttpd), и байты
+    файла не проходят через Python. Имена файлов изображений строятся
+    по их содержимому, поэтому ответы кешируются надолго.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Файл не найден.')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('Файл не найден.')
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден.')
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        return HttpResponseNotModified()
+    content_type = (mimetypes.guess_type(full_path)[0]
+                    or 'application/octet-stream')
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT + quote(path)
+        )
+    elif settings.MEDIA_SENDFILE_HEADER:
+        response = HttpResponse(content_type=content_type)
+        response[settings.MEDIA_SENDFILE_HEADER] = full_path
+    else:
+        response = stream_file(request, full_path, stat, content_type)
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = (
+        f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable'
+    )
+    return response
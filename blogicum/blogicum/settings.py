@@ -60,6 +60,12 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -90,11 +96,34 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
+# Без DEBUG файлы из MEDIA_ROOT отдаёт blogicum.media.serve_media.
+# Префикс внутреннего location nginx для X-Accel-Redirect или заголовок
+# X-Sendfile передают отдачу байтов файла веб-серверу.
+MEDIA_ACCEL_REDIRECT = None
+MEDIA_SENDFILE_HEADER = None
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LEN_FIELD_TITLE = 256
 SHOW_POSTS = 10
+SHOW_COMMENTS = 20
+CURSOR_PAGINATION = False
+POSTS_COUNT_CACHE_TIMEOUT = 0
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+POST_CARD_CACHE_TIMEOUT = 60 * 60
+CATEGORY_CACHE_TIMEOUT = 60 * 60
+# Ширина уменьшенных копий изображений публикаций: карточка ленты,
+# страница публикации и экраны высокой плотности.
+POST_IMAGE_WIDTHS = (640, 960, 1920)
+# Современные форматы копий в порядке предпочтения; создаются только
+# те, запись которых поддерживает установленный Pillow.
+POST_IMAGE_MODERN_FORMATS = ('AVIF', 'WEBP')
+POST_IMAGE_QUALITY = {'JPEG': 85, 'PNG': None, 'WEBP': 80, 'AVIF': 60}
+SEARCH_MAX_RESULTS = 1000
+SEARCH_POSTGRES_CONFIG = 'russian'
+POST_IMAGE_JOB_ATTEMPTS = 3
+POST_IMAGE_JOB_TIMEOUT = 10 * 60
 LEN_TEXT_ADMIN_LIST = 5
 
 LOGIN_REDIRECT_URL = 'blog:index'
@@ -0,0 +1,35 @@
+import os
+from copy import deepcopy
+
+from .settings import *  # noqa: F401, F403
+from .settings import TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)  # noqa: F405
+
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', ','.join(ALLOWED_HOSTS)  # noqa: F405
+).split(',')
+
+# Шаблоны разбираются один раз на процесс и хранятся в памяти.
+TEMPLATES = deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# Разбор всех шаблонов проекта при старте WSGI-процесса.
+WARM_TEMPLATES_ON_STARTUP = True
+
+# Загруженные файлы отдаёт nginx из внутреннего location:
+#     location /internal-media/ {
+#         internal;
+#         alias /path/to/blogicum/media/;
+#     }
+MEDIA_ACCEL_REDIRECT = os.environ.get(
+    'DJANGO_MEDIA_ACCEL_REDIRECT', '/internal-media/'
+)
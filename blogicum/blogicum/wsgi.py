@@ -1,7 +1,12 @@
 import os
 
+from django.conf import settings
+from django.core.management import call_command
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
 application = get_wsgi_application()
+
+if getattr(settings, 'WARM_TEMPLATES_ON_STARTUP', False):
+    call_command('warm_templates', verbosity=0)
@@ -0,0 +1,39 @@
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(
+        'blog.Comment', post=post, author=another_user
+    )
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        'Убедитесь, что при добавлении комментария увеличивается счётчик '
+        'комментариев публикации.'
+    )
+    comments[0].delete()
+    another_user.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0, (
+        'Убедитесь, что при удалении комментариев, в том числе каскадном, '
+        'счётчик комментариев публикации уменьшается.'
+    )
+
+
+def test_recount_comments_repairs_counter(
+        mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(2).blend('blog.Comment', post=post, author=another_user)
+    type(post).objects.filter(pk=post.pk).update(comment_count=42)
+    call_command('recount_comments')
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        'Убедитесь, что команда recount_comments восстанавливает счётчик '
+        'комментариев публикации.'
+    )
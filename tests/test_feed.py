@@ -0,0 +1,127 @@
+from datetime import timedelta
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from blog import search
+from blog.cache import get_generations
+from blog.models import FeedEntry, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_feed_follows_post_and_category(post_with_published_location):
+    post = post_with_published_location
+    assert FeedEntry.objects.filter(post=post).exists(), (
+        'Убедитесь, что опубликованный пост попадает в материализованную '
+        'ленту.'
+    )
+    post.is_published = False
+    post.save()
+    assert not FeedEntry.objects.filter(post=post).exists(), (
+        'Убедитесь, что снятый с публикации пост удаляется из ленты.'
+    )
+    post.is_published = True
+    post.save()
+    category = post.category
+    category.is_published = False
+    category.save()
+    assert not FeedEntry.objects.filter(post=post).exists(), (
+        'Убедитесь, что посты скрытой категории удаляются из ленты.'
+    )
+    category.is_published = True
+    category.save()
+    assert FeedEntry.objects.filter(post=post).exists(), (
+        'Убедитесь, что посты снова опубликованной категории '
+        'возвращаются в ленту.'
+    )
+
+
+def test_feed_comment_count(mixer, another_user, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend('blog.Comment', post=post, author=another_user)
+    assert FeedEntry.objects.get(post=post).comment_count == 2
+
+
+def test_reconcile_feed_repairs_drift(
+        many_posts_with_published_locations,
+        unpublished_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    hidden = unpublished_posts_with_published_locations[0]
+    FeedEntry.objects.filter(post=posts[0]).delete()
+    FeedEntry.objects.filter(post=posts[1]).update(comment_count=7)
+    FeedEntry.objects.create(
+        post=hidden, pub_date=hidden.pub_date,
+        category=hidden.category, author=hidden.author
+    )
+    call_command('reconcile_feed')
+    assert set(FeedEntry.objects.values_list('post_id', flat=True)) == {
+        post.pk for post in posts
+    }, 'Убедитесь, что команда reconcile_feed восстанавливает ленту.'
+    assert FeedEntry.objects.get(post=posts[1]).comment_count == 0
+
+
+def test_feed_page_query_uses_feed_index(published_category):
+    plan = FeedEntry.objects.with_posts().filter(
+        category=published_category
+    ).order_by('-pub_date')[:10].explain()
+    assert 'feed_category_pub_date_idx' in plan, (
+        'Убедитесь, что страница категории читается из ленты по индексу. '
+        f'План запроса:\n{plan}'
+    )
+
+
+def test_scheduled_post_published_by_worker(client, future_posts):
+    post = future_posts[0]
+    assert not FeedEntry.objects.filter(post=post).exists(), (
+        'Убедитесь, что отложенный пост не попадает в ленту раньше срока.'
+    )
+    client.get('/')
+    client.get(f'/posts/{post.id}/')
+    generations = get_generations(('feed', f'post:{post.id}'))
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    call_command('publish_scheduled')
+    assert FeedEntry.objects.filter(post=post).exists(), (
+        'Убедитесь, что команда publish_scheduled переводит в ленту посты, '
+        'дата публикации которых наступила.'
+    )
+    after = get_generations(('feed', f'post:{post.id}'))
+    assert all(after[scope] != generations[scope] for scope in after), (
+        'Убедитесь, что при публикации отложенного поста сбрасывается кеш.'
+    )
+    assert post.title in client.get('/').content.decode('utf-8')
+    assert client.get(f'/posts/{post.id}/').status_code == 200
+
+
+def test_migration_drops_scheduled_feed_entries(
+        mixer, user, published_category
+):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, title='Будущее',
+        pub_date=timezone.now() + timedelta(days=30),
+    )
+    FeedEntry.objects.create(
+        post=post, pub_date=post.pub_date, category=published_category,
+        author=user,
+    )
+    search.index_posts(Post.objects.filter(pk=post.pk))
+    assert search.search('будущее') == [post.pk]
+    migration = import_module(
+        'blog.migrations.0013_drop_scheduled_feed_entries'
+    )
+    migration.drop_scheduled_entries(
+        apps, connection.schema_editor(atomic=False)
+    )
+    assert not FeedEntry.objects.filter(post=post).exists(), (
+        'Убедитесь, что миграция удаляет из ленты посты с датой '
+        'публикации в будущем.'
+    )
+    assert search.search('будущее') == []
@@ -0,0 +1,20 @@
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from blog import feed
+from blog.models import FeedEntry, Post
+
+pytestmark = [pytest.mark.django_db]
+
+FIXTURE = Path(__file__).resolve().parents[1] / 'db.json'
+
+
+def test_db_json_loads():
+    call_command('loaddata', FIXTURE, verbosity=0)
+    assert Post.objects.count() == 39, (
+        'Убедитесь, что фикстура db.json загружается в текущую схему базы '
+        'данных.'
+    )
+    assert FeedEntry.objects.count() == feed.get_feed_source().count()
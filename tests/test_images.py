@@ -0,0 +1,293 @@
+from importlib import import_module
+from io import BytesIO
+
+import pytest
+from django.apps import apps
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from blog import jobs
+from blog.models import ImageJob, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def _image_file(width, height, name='big.jpg'):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color=(73, 109, 137)).save(
+        buffer, format='JPEG'
+    )
+    return ImageFile(buffer, name=name)
+
+
+def _stored_names(post):
+    names = [post.image.name, *post.image_derivatives['sizes'].values()]
+    for sizes in post.image_derivatives['formats'].values():
+        names.extend(sizes.values())
+    return names
+
+
+@pytest.fixture
+def post_with_big_image(
+        mixer, media_root, user, published_location, published_category
+):
+    post = mixer.blend(
+        'blog.Post', author=user, location=published_location,
+        category=published_category, image=_image_file(2400, 1200)
+    )
+    jobs.run_pending()
+    post.refresh_from_db()
+    return post
+
+
+def test_derivatives_created_on_upload(post_with_big_image, media_root):
+    post = post_with_big_image
+    sizes = post.image_derivatives['sizes']
+    assert sorted(sizes, key=int) == ['640', '960', '1920'], (
+        'Убедитесь, что при загрузке изображения публикации создаются '
+        'уменьшенные копии.'
+    )
+    for width, name in sizes.items():
+        with Image.open(media_root / name) as image:
+            assert image.size == (int(width), int(width) // 2)
+
+
+def test_small_image_not_upscaled(
+        mixer, media_root, user, published_category
+):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=_image_file(800, 600)
+    )
+    jobs.run_pending()
+    post.refresh_from_db()
+    assert list(post.image_derivatives['sizes']) == ['640']
+
+
+def test_replaced_image_derivatives_removed(
+        post_with_big_image, media_root, django_capture_on_commit_callbacks
+):
+    post = post_with_big_image
+    old_names = list(post.image_derivatives['sizes'].values())
+    post.image = _image_file(1000, 500, name='other.jpg')
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    jobs.run_pending()
+    post.refresh_from_db()
+    assert all(not (media_root / name).exists() for name in old_names), (
+        'Убедитесь, что копии прежнего изображения удаляются.'
+    )
+    assert list(post.image_derivatives['sizes']) == ['640', '960']
+
+
+def test_webp_derivatives_created(post_with_big_image, media_root):
+    webp = post_with_big_image.image_derivatives['formats']['image/webp']
+    assert sorted(webp, key=int) == ['640', '960', '1920', '2400'], (
+        'Убедитесь, что для изображения создаются копии в формате WebP, '
+        'включая копию в полную ширину.'
+    )
+    with Image.open(media_root / webp['640']) as image:
+        assert image.format == 'WEBP'
+
+
+def test_feed_card_uses_picture_sources(client, post_with_big_image):
+    webp = post_with_big_image.image_derivatives['formats']['image/webp']
+    content = client.get('/').content.decode('utf-8')
+    assert '<source type="image/webp"' in content and (
+        f'{webp["960"]} 960w' in content
+    ), (
+        'Убедитесь, что карточка публикации предлагает браузеру копии в '
+        'формате WebP через `<picture>`.'
+    )
+
+
+def test_feed_card_uses_srcset(client, post_with_big_image):
+    post = post_with_big_image
+    content = client.get('/').content.decode('utf-8')
+    assert 'srcset="' in content and (
+        f'{post.image_derivatives["sizes"]["640"]} 640w' in content
+    ), (
+        'Убедитесь, что карточка публикации выводит уменьшенные копии '
+        'изображения в атрибуте `srcset`.'
+    )
+
+
+def test_placeholder_until_derivatives_ready(
+        client, mixer, media_root, user, published_category
+):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=_image_file(1000, 500)
+    )
+    content = client.get(f'/posts/{post.id}/').content.decode('utf-8')
+    assert 'srcset' not in content and 'data:image/svg+xml' in content, (
+        'Убедитесь, что до изготовления копий выводится заглушка.'
+    )
+    call_command('process_images', workers=1, verbosity=0)
+    content = client.get(f'/posts/{post.id}/').content.decode('utf-8')
+    assert 'srcset' in content, (
+        'Убедитесь, что после обработки очереди страница публикации '
+        'сразу выводит уменьшенные копии.'
+    )
+    assert not ImageJob.objects.exists()
+
+
+def test_broken_image_falls_back_to_original(
+        client, settings, mixer, media_root, user, published_category
+):
+    settings.POST_IMAGE_JOB_ATTEMPTS = 2
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timezone.timedelta(1),
+        image=_image_file(1000, 500)
+    )
+    (media_root / post.image.name).write_bytes(b'not an image')
+    assert jobs.run_pending() == 1
+    assert ImageJob.objects.get().status == ImageJob.PENDING
+    jobs.run_pending()
+    job = ImageJob.objects.get()
+    post.refresh_from_db()
+    assert job.status == ImageJob.FAILED and job.attempts == 2, (
+        'Убедитесь, что задание повторяется заданное число раз.'
+    )
+    assert post.image_derivatives == {
+        'source': post.image.name, 'sizes': {}
+    }
+    for url in ('/', f'/posts/{post.id}/'):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert f'src="{post.image.url}"' in response.content.decode(), (
+            'Убедитесь, что при неудачной обработке изображения выводится '
+            'оригинал.'
+        )
+
+
+def test_identical_uploads_stored_once(
+        mixer, media_root, another_user, post_with_big_image
+):
+    first = post_with_big_image
+    second = mixer.blend(
+        'blog.Post', author=another_user, category=first.category,
+        image=_image_file(2400, 1200, name='copy.jpg')
+    )
+    assert second.image.name == first.image.name, (
+        'Убедитесь, что одинаковые изображения хранятся одним файлом.'
+    )
+    assert second.image_derivatives == first.image_derivatives, (
+        'Убедитесь, что копии уже обработанного файла используются '
+        'повторно.'
+    )
+    assert not ImageJob.objects.exists()
+    assert len([path for path in media_root.rglob('*') if path.is_file()]) \
+        == len(_stored_names(first))
+
+
+def test_image_deleted_with_last_reference(
+        mixer, media_root, another_user, post_with_big_image,
+        django_capture_on_commit_callbacks
+):
+    first = post_with_big_image
+    second = mixer.blend(
+        'blog.Post', author=another_user, category=first.category,
+        image=_image_file(2400, 1200)
+    )
+    files = _stored_names(first)
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert all((media_root / name).exists() for name in files), (
+        'Убедитесь, что файл изображения не удаляется, пока на него '
+        'ссылаются другие публикации.'
+    )
+    second.image = _image_file(1000, 500, name='other.jpg')
+    with django_capture_on_commit_callbacks(execute=True):
+        second.save()
+    assert not any((media_root / name).exists() for name in files), (
+        'Убедитесь, что файл изображения и его копии удаляются вместе с '
+        'последней ссылкой на него.'
+    )
+
+
+def test_image_kept_when_delete_rolled_back(
+        media_root, post_with_big_image, django_capture_on_commit_callbacks
+):
+    post = post_with_big_image
+    files = _stored_names(post)
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                post.delete()
+                raise RuntimeError
+    assert all((media_root / name).exists() for name in files), (
+        'Убедитесь, что файлы изображения не удаляются, если удаление '
+        'публикации откатилось.'
+    )
+
+
+def test_upload_named_like_derivative_is_hashed(
+        mixer, media_root, user, published_category, post_with_big_image
+):
+    derivative = post_with_big_image.image_derivatives['sizes']['640']
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=_image_file(300, 200, name=derivative.rsplit('/', 1)[1])
+    )
+    assert post.image.name != derivative, (
+        'Убедитесь, что загруженный файл всегда сохраняется под хешем '
+        'своего содержимого, каким бы ни было его имя.'
+    )
+    with Image.open(media_root / post.image.name) as image:
+        assert image.size == (300, 200)
+
+
+@pytest.fixture
+def legacy_post(mixer, media_root, user, published_category):
+    """Публикация с изображением, загруженным до появления копий."""
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timezone.timedelta(1),
+        image=_image_file(1000, 500)
+    )
+    ImageJob.objects.all().delete()
+    Post.objects.filter(pk=post.pk).update(image_derivatives={})
+    post.refresh_from_db()
+    return post
+
+
+def test_legacy_image_rendered_and_enqueued(client, legacy_post):
+    post = legacy_post
+    content = client.get(f'/posts/{post.id}/').content.decode()
+    assert f'src="{post.image.url}"' in content, (
+        'Убедитесь, что для изображений, загруженных до появления копий, '
+        'выводится оригинал, а не заглушка.'
+    )
+    migration = import_module('blog.migrations.0014_enqueue_existing_images')
+    migration.enqueue_existing_images(apps, None)
+    assert ImageJob.objects.get().source == post.image.name, (
+        'Убедитесь, что миграция ставит в очередь изображения без копий.'
+    )
+    jobs.run_pending()
+    post.refresh_from_db()
+    assert list(post.image_derivatives['sizes']) == ['640', '960']
+
+
+def test_replaced_legacy_image_released(
+        media_root, legacy_post, django_capture_on_commit_callbacks
+):
+    post = legacy_post
+    old_name = post.image.name
+    post.image = _image_file(800, 600, name='other.jpg')
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    assert not (media_root / old_name).exists(), (
+        'Убедитесь, что прежний файл изображения удаляется, даже если для '
+        'него не было копий.'
+    )
@@ -0,0 +1,77 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+from blog import feed
+from blog.models import Comment
+from blog.views import CategoryView, IndexView, Profile
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _view_queryset(view_class, user, **kwargs):
+    """Выборка, которую строит представление для запроса пользователя."""
+    request = RequestFactory().get('/')
+    request.user = user
+    view = view_class()
+    view.setup(request, **kwargs)
+    return view.get_queryset()
+
+
+@pytest.mark.parametrize(
+    ('get_queryset', 'index_names'),
+    [
+        (
+            lambda category, user: _view_queryset(
+                IndexView, AnonymousUser()
+            )[:10],
+            ('feed_pub_date_idx',),
+        ),
+        (
+            lambda category, user: _view_queryset(
+                CategoryView, AnonymousUser(), category_slug=category.slug
+            )[:10],
+            ('feed_category_pub_date_idx',),
+        ),
+        (
+            lambda category, user: _view_queryset(
+                Profile, AnonymousUser(), username=user.username
+            )[:10],
+            ('feed_author_pub_date_idx',),
+        ),
+        (
+            lambda category, user: _view_queryset(
+                Profile, user, username=user.username
+            )[:10],
+            ('post_author_pub_date_idx',),
+        ),
+        (
+            lambda category, user: feed.get_scheduled_posts().filter(
+                category=category
+            ),
+            ('post_category_feed_idx',),
+        ),
+        (
+            lambda category, user: feed.get_feed_source().filter(
+                feed_entry__isnull=True
+            ),
+            ('post_feed_partial_idx',),
+        ),
+        (
+            lambda category, user: Comment.objects.filter(
+                post_id=1
+            ).order_by('created_at'),
+            ('comment_post_created_at_idx',),
+        ),
+    ],
+    ids=['feed', 'category', 'profile', 'own_profile', 'category_sync',
+         'publish_due', 'comments'],
+)
+def test_feed_queries_use_indexes(
+        published_category, user, get_queryset, index_names
+):
+    plan = get_queryset(published_category, user).explain()
+    assert any(name in plan for name in index_names), (
+        'Убедитесь, что запрос использует составной индекс '
+        f'{" или ".join(index_names)}. План запроса:\n{plan}'
+    )
@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.fixture
+def media_file(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    (tmp_path / 'blog_images').mkdir()
+    (tmp_path / 'blog_images' / 'photo.jpg').write_bytes(bytes(range(200)))
+    return '/media/blog_images/photo.jpg'
+
+
+def test_media_served_with_long_cache(client, media_file):
+    response = client.get(media_file)
+    assert response.status_code == HTTPStatus.OK
+    assert b''.join(response.streaming_content) == bytes(range(200))
+    assert 'immutable' in response['Cache-Control'], (
+        'Убедитесь, что загруженные файлы отдаются с долгим сроком '
+        'кеширования.'
+    )
+    assert response['Accept-Ranges'] == 'bytes'
+    not_modified = client.get(
+        media_file, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.parametrize(
+    ('header', 'content_range', 'body'),
+    [
+        ('bytes=10-19', 'bytes 10-19/200', bytes(range(10, 20))),
+        ('bytes=190-', 'bytes 190-199/200', bytes(range(190, 200))),
+        ('bytes=-5', 'bytes 195-199/200', bytes(range(195, 200))),
+    ],
+)
+def test_media_range_requests(client, media_file, header, content_range,
+                              body):
+    response = client.get(media_file, HTTP_RANGE=header)
+    assert response.status_code == HTTPStatus.PARTIAL_CONTENT, (
+        'Убедитесь, что загруженные файлы отдаются частями по заголовку '
+        'Range.'
+    )
+    assert response['Content-Range'] == content_range
+    assert b''.join(response.streaming_content) == body
+
+
+def test_media_unsatisfiable_range(client, media_file):
+    response = client.get(media_file, HTTP_RANGE='bytes=500-')
+    assert response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+    assert response['Content-Range'] == 'bytes */200'
+
+
+def test_media_accel_redirect(client, settings, media_file):
+    settings.MEDIA_ACCEL_REDIRECT = '/internal-media/'
+    response = client.get(media_file)
+    assert response['X-Accel-Redirect'] == (
+        '/internal-media/blog_images/photo.jpg'
+    ), (
+        'Убедитесь, что при MEDIA_ACCEL_REDIRECT файл отдаёт веб-сервер.'
+    )
+    assert response.content == b''
+
+
+def test_media_outside_root_not_served(client, media_file):
+    assert client.get('/media/..%2F..%2Fmanage.py').status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    assert client.get('/media/blog_images/missing.jpg').status_code == (
+        HTTPStatus.NOT_FOUND
+    )
@@ -0,0 +1,270 @@
+import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.views import View
+
+from blog.cache import get_generations
+from blog.mixins import AnonymousPageCacheMixin
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def page_urls(post_with_published_location):
+    post = post_with_published_location
+    return (
+        '/',
+        f'/category/{post.category.slug}/',
+        f'/posts/{post.id}/',
+    )
+
+
+def test_anonymous_pages_served_from_cache(
+        client, django_assert_num_queries, page_urls
+):
+    for url in page_urls:
+        first = client.get(url)
+        with django_assert_num_queries(0):
+            second = client.get(url)
+        assert second.content == first.content, (
+            f'Убедитесь, что страница `{url}` для анонимных читателей '
+            'отдаётся из кеша.'
+        )
+
+
+def test_page_cache_invalidated_on_post_change(
+        client, page_urls, post_with_published_location
+):
+    post = post_with_published_location
+    for url in page_urls:
+        client.get(url)
+    post.title = 'Заголовок после редактирования'
+    post.save()
+    for url in page_urls:
+        content = client.get(url).content.decode('utf-8')
+        assert post.title in content, (
+            f'Убедитесь, что кеш страницы `{url}` сбрасывается при '
+            'изменении публикации.'
+        )
+
+
+def test_authenticated_pages_not_cached(
+        user_client, page_urls
+):
+    for url in page_urls:
+        user_client.get(url)
+        response = user_client.get(url)
+        assert response.context is not None, (
+            'Убедитесь, что страницы для авторизованных пользователей не '
+            'кешируются.'
+        )
+
+
+def test_category_unpublish_invalidates_pages(
+        client, page_urls, post_with_published_location
+):
+    for url in page_urls:
+        client.get(url)
+    category = post_with_published_location.category
+    category.is_published = False
+    category.save()
+    index_content = client.get('/').content.decode('utf-8')
+    assert post_with_published_location.title not in index_content, (
+        'Убедитесь, что кеш главной страницы сбрасывается при снятии '
+        'категории с публикации.'
+    )
+    assert client.get(page_urls[2]).status_code == 404, (
+        'Убедитесь, что кеш страницы публикации сбрасывается при снятии '
+        'категории с публикации.'
+    )
+
+
+def test_generation_bump_is_scoped(user, another_user):
+    scopes = ('feed', f'profile:{user.pk}', f'profile:{another_user.pk}')
+    before = get_generations(scopes)
+    user.first_name = 'Имя'
+    user.save()
+    after_edit = get_generations(scopes)
+    assert after_edit[f'profile:{user.pk}'] != before[f'profile:{user.pk}']
+    assert after_edit[f'profile:{another_user.pk}'] == (
+        before[f'profile:{another_user.pk}']
+    ), 'Убедитесь, что сбрасываются только затронутые области кеша.'
+    user.save(update_fields=['last_login'])
+    assert get_generations(scopes) == after_edit, (
+        'Убедитесь, что обновление времени входа пользователя не '
+        'сбрасывает кеш.'
+    )
+
+
+def test_post_cards_cached_per_post(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.get('/')
+    type(post).objects.filter(pk=post.pk).update(title='Без сигналов')
+    content = user_client.get('/').content.decode('utf-8')
+    assert 'Без сигналов' not in content, (
+        'Убедитесь, что карточки публикаций берутся из кеша фрагментов.'
+    )
+    post.title = 'Новый заголовок'
+    post.save()
+    content = user_client.get('/').content.decode('utf-8')
+    assert post.title in content, (
+        'Убедитесь, что кеш карточки сбрасывается при изменении публикации.'
+    )
+
+
+def test_category_resolved_from_cache(
+        user_client, django_assert_num_queries, published_category
+):
+    url = f'/category/{published_category.slug}/'
+    user_client.get(url)
+    with django_assert_num_queries(3):
+        user_client.get(url)
+    published_category.is_published = False
+    published_category.save()
+    assert user_client.get(url).status_code == 404, (
+        'Убедитесь, что кеш категории сбрасывается при её изменении.'
+    )
+
+
+@pytest.mark.parametrize(
+    ('client_fixture', 'n_queries'),
+    [('client', 0), ('user_client', 2)],
+    ids=['anonymous', 'authenticated'],
+)
+def test_conditional_get_returns_not_modified(
+        request, django_assert_num_queries, page_urls,
+        post_with_published_location, user, client_fixture, n_queries
+):
+    client = request.getfixturevalue(client_fixture)
+    urls = (*page_urls, f'/profile/{user.username}/')
+    for url in urls:
+        response = client.get(url)
+        # Страница публикации с формой комментария отдаётся без
+        # Last-Modified: смену CSRF-токена отражает только ETag.
+        with_form = client_fixture == 'user_client' and '/posts/' in url
+        assert response.has_header('ETag') and response.has_header(
+            'Last-Modified'
+        ) != with_form, (
+            f'Убедитесь, что страница `{url}` отдаёт ETag и Last-Modified.'
+        )
+        assert 'no-cache' in response['Cache-Control'], (
+            f'Убедитесь, что страница `{url}` проверяется при каждом '
+            'запросе.'
+        )
+        assert ('private' in response['Cache-Control']) == (
+            client_fixture == 'user_client'
+        )
+        with django_assert_num_queries(
+            n_queries if url in page_urls else n_queries + 1
+        ):
+            not_modified = client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        assert not_modified.status_code == 304, (
+            f'Убедитесь, что неизменённая страница `{url}` отдаётся с кодом '
+            '304 без отрисовки.'
+        )
+        if not with_form:
+            assert client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            ).status_code == 304
+    post = post_with_published_location
+    post.title = 'Заголовок после редактирования'
+    post.save()
+    for url in urls:
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == 200, (
+            f'Убедитесь, что после изменения публикации страница `{url}` '
+            'отдаётся целиком.'
+        )
+
+
+def test_comment_changes_post_last_modified(
+        client, another_user, post_with_published_location, mixer
+):
+    post = post_with_published_location
+    url = f'/posts/{post.id}/'
+    etag = client.get(url)['ETag']
+    mixer.blend('blog.Comment', post=post, author=another_user)
+    post.refresh_from_db()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200 and post.updated_at > post.created_at, (
+        'Убедитесь, что комментарий обновляет дату изменения публикации.'
+    )
+
+
+def test_deletion_changes_last_modified(
+        client, monkeypatch, mixer, user, post_with_published_location
+):
+    post = post_with_published_location
+    other = mixer.blend(
+        'blog.Post', author=user, category=post.category,
+        pub_date=post.pub_date,
+    )
+    last_modified = client.get('/')['Last-Modified']
+    real_time = time.time
+    monkeypatch.setattr(time, 'time', lambda: real_time() + 5)
+    other.delete()
+    assert client.get(
+        '/', HTTP_IF_MODIFIED_SINCE=last_modified
+    ).status_code == 200, (
+        'Убедитесь, что удаление публикации меняет Last-Modified ленты.'
+    )
+
+
+def test_hidden_post_not_answered_with_not_modified(
+        client, user_client, unpublished_posts_with_published_locations
+):
+    post = unpublished_posts_with_published_locations[0]
+    url = f'/posts/{post.id}/'
+    assert user_client.get(url).status_code == 200
+    for headers in (
+        {'HTTP_IF_NONE_MATCH': '*'},
+        {'HTTP_IF_MODIFIED_SINCE': 'Fri, 01 Jan 2100 00:00:00 GMT'},
+    ):
+        assert client.get(url, **headers).status_code == 404, (
+            'Убедитесь, что на условный запрос к скрытой публикации '
+            'отдаётся 404, а не 304.'
+        )
+
+
+class HeadersView(AnonymousPageCacheMixin, View):
+    calls = 0
+
+    def get(self, request):
+        HeadersView.calls += 1
+        response = HttpResponse('ok', content_type='text/plain')
+        response['Vary'] = 'Accept-Language'
+        response['X-Page'] = 'headers'
+        return response
+
+
+def test_cached_page_keeps_headers():
+    request = RequestFactory().get('/headers/')
+    request.user = AnonymousUser()
+    first = HeadersView.as_view()(request)
+    second = HeadersView.as_view()(request)
+    assert HeadersView.calls == 1
+    assert dict(second.items()) == dict(first.items()), (
+        'Убедитесь, что страница из кеша отдаётся с теми же заголовками.'
+    )
+
+
+def test_csrf_rotation_changes_post_etag(
+        user_client, post_with_published_location
+):
+    url = f'/posts/{post_with_published_location.id}/'
+    user_client.get(url)
+    etag = user_client.get(url)['ETag']
+    assert user_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    user_client.cookies['csrftoken'] = 'x' * 32
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        'Убедитесь, что после смены CSRF-токена страница с формой '
+        'комментария отдаётся заново.'
+    )
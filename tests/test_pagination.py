@@ -0,0 +1,155 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _published_ids():
+    return list(
+        Post.objects.filter(
+            pub_date__lt=timezone.now(),
+            is_published=True,
+            category__is_published=True,
+        ).order_by('-pub_date', '-pk').values_list('pk', flat=True)
+    )
+
+
+def test_cursor_pagination_walks_whole_feed(
+        client, many_posts_with_published_locations
+):
+    expected = _published_ids()
+    seen = []
+    url = '/?after='
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Убедитесь, что страницы ленты по курсору загружаются без ошибок.'
+        )
+        page = response.context['page_obj']
+        assert len(page) <= 10
+        seen.extend(post.pk for post in page)
+        url = f'/?after={page.next_cursor}' if page.has_next() else None
+    assert seen == expected, (
+        'Убедитесь, что при постраничном выводе по курсору лента выводится '
+        'целиком, без пропусков и повторов.'
+    )
+
+
+def test_cursor_pagination_with_equal_pub_dates(
+        client, mixer, user, published_category
+):
+    pub_date = timezone.now().replace(microsecond=123456) - timezone.timedelta(
+        days=1
+    )
+    posts = mixer.cycle(15).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=pub_date,
+    )
+    posts.append(mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=pub_date - timezone.timedelta(days=1),
+    ))
+    seen = []
+    url = '/?after='
+    while url:
+        page = client.get(url).context['page_obj']
+        seen.extend(post.pk for post in page)
+        url = f'/?after={page.next_cursor}' if page.has_next() else None
+    assert sorted(seen) == sorted(post.pk for post in posts), (
+        'Убедитесь, что при постраничном выводе по курсору выводятся все '
+        'публикации с одинаковой датой, каждая ровно один раз.'
+    )
+
+
+def test_cursor_pagination_invalid_cursor(client):
+    response = client.get('/?after=not-a-cursor')
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        'Убедитесь, что при неверном курсоре страницы возвращается ошибка 404.'
+    )
+
+
+@pytest.mark.parametrize('url', ['/', '/profile/{username}/'])
+def test_page_count_skips_comments_join(
+        client, user, url, many_posts_with_published_locations
+):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url.format(username=user.username))
+    assert response.status_code == HTTPStatus.OK
+    count_queries = [
+        q['sql'] for q in ctx.captured_queries if 'COUNT(*)' in q['sql']
+    ]
+    assert count_queries and not any(
+        'blog_comment' in sql for sql in count_queries
+    ), (
+        'Убедитесь, что число публикаций для пагинации считается без JOIN '
+        'таблицы комментариев.'
+    )
+
+
+def test_comments_loaded_in_portions(
+        client, mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(25).blend(
+        'blog.Comment', post=post, author=another_user
+    )
+    page = client.get(f'/posts/{post.id}/').context['comments']
+    assert len(page) == 20 and page.has_next(), (
+        'Убедитесь, что на странице публикации выводится только первая '
+        'порция комментариев.'
+    )
+    response = client.get(
+        f'/posts/{post.id}/comments/?after={page.next_cursor}',
+        HTTP_ACCEPT='application/json',
+    )
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert data['next'] is None
+    for comment in comments[20:]:
+        assert f'comment_{comment.id}"' in data['html'], (
+            'Убедитесь, что следующая порция комментариев отдаётся по '
+            'курсору.'
+        )
+    for comment in comments[:20]:
+        assert f'comment_{comment.id}"' not in data['html'], (
+            'Убедитесь, что порции комментариев не пересекаются.'
+        )
+    page = client.get(
+        f'/posts/{post.id}/?comments_after={page.next_cursor}'
+    ).context['comments']
+    assert [comment.pk for comment in page] == [
+        comment.pk for comment in comments
+    ], (
+        'Убедитесь, что без JavaScript страница публикации выводит все '
+        'комментарии до конца следующей порции.'
+    )
+
+
+def test_comments_endpoint_hides_unpublished_post(
+        another_user_client, unpublished_posts_with_published_locations
+):
+    post = unpublished_posts_with_published_locations[0]
+    response = another_user_client.get(f'/posts/{post.id}/comments/')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_page_links_are_elided(client, mixer, user, published_category):
+    mixer.cycle(300).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timezone.timedelta(1),
+    )
+    response = client.get('/?page=15')
+    assert response.status_code == HTTPStatus.OK
+    content = response.content.decode('utf-8')
+    assert '?page=13"' in content and '?page=17"' in content, (
+        'Убедитесь, что в пагинации выводятся ссылки на соседние страницы.'
+    )
+    assert '?page=20"' not in content and '…' in content, (
+        'Убедитесь, что номера далёких страниц ленты свёрнуты в многоточие.'
+    )
@@ -0,0 +1,107 @@
+import pytest
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_cards_fetched_in_one_query(
+        django_assert_num_queries, many_posts_with_published_locations
+):
+    with django_assert_num_queries(1):
+        posts = list(Post.objects.published().for_cards()[:10])
+        for post in posts:
+            (post.title, post.text, post.pub_date, post.image,
+             post.comment_count, post.author.username, post.location.name,
+             post.location.is_published, post.category.title,
+             post.category.slug, post.category.is_published)
+    assert posts, (
+        'Убедитесь, что метод `for_cards()` возвращает опубликованные посты.'
+    )
+
+
+@pytest.mark.parametrize(
+    ('url', 'n_queries'),
+    [
+        ('/', 3),
+        ('/category/{category_slug}/', 4),
+        ('/profile/{username}/', 4),
+    ],
+    ids=['index', 'category', 'profile'],
+)
+def test_feed_query_budget(
+        client, django_assert_num_queries, user, published_category,
+        many_posts_with_published_locations, url, n_queries
+):
+    url = url.format(
+        category_slug=published_category.slug, username=user.username
+    )
+    with django_assert_num_queries(n_queries):
+        client.get(url)
+
+
+@pytest.mark.parametrize(
+    ('client_fixture', 'n_queries'),
+    [
+        ('client', 3),
+        ('user_client', 5),
+        ('another_user_client', 5),
+    ],
+    ids=['anonymous', 'author', 'non-author'],
+)
+def test_post_detail_query_budget(
+        request, django_assert_num_queries, mixer, another_user,
+        post_with_published_location, client_fixture, n_queries
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend('blog.Comment', post=post, author=another_user)
+    client = request.getfixturevalue(client_fixture)
+    with django_assert_num_queries(n_queries):
+        response = client.get(f'/posts/{post.id}/')
+    assert response.status_code == 200
+
+
+def test_post_detail_hidden_from_non_author(
+        user_client, another_user_client,
+        unpublished_posts_with_published_locations
+):
+    post = unpublished_posts_with_published_locations[0]
+    assert user_client.get(f'/posts/{post.id}/').status_code == 200, (
+        'Убедитесь, что автор видит свою снятую с публикации публикацию.'
+    )
+    response = another_user_client.get(f'/posts/{post.id}/')
+    assert response.status_code == 404, (
+        'Убедитесь, что снятая с публикации публикация недоступна другим '
+        'пользователям.'
+    )
+
+
+@pytest.mark.parametrize(
+    ('url', 'n_queries'),
+    [
+        ('/posts/{post_id}/edit/', 5),
+        ('/posts/{post_id}/delete/', 4),
+        ('/posts/{post_id}/edit_comment/{comment_id}', 3),
+        ('/posts/{post_id}/delete_comment/{comment_id}', 3),
+    ],
+    ids=['edit_post', 'delete_post', 'edit_comment', 'delete_comment'],
+)
+def test_author_views_fetch_object_once(
+        user, user_client, django_assert_num_queries, comment_to_a_post,
+        url, n_queries
+):
+    comment = comment_to_a_post
+    comment.author = user
+    comment.save()
+    url = url.format(post_id=comment.post_id, comment_id=comment.id)
+    with django_assert_num_queries(n_queries) as captured:
+        response = user_client.get(url)
+    assert response.status_code == 200
+    object_queries = [
+        q['sql'] for q in captured.captured_queries
+        if q['sql'].startswith(('SELECT "blog_post"', 'SELECT "blog_comment"'))
+    ]
+    assert len(object_queries) == 1, (
+        'Убедитесь, что при редактировании и удалении объект загружается '
+        'из базы данных один раз за запрос.'
+    )
@@ -0,0 +1,197 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import feed, search
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def searchable_posts(mixer, user, published_category):
+    published = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        title='Лодки на реке', text='Рыбаки вышли на лодках до рассвета.',
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+    hidden = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=False, title='Черновик про лодки', text='Текст.',
+    )
+    other = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        title='Горы', text='Восхождение на вершину.',
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+    return published, hidden, other
+
+
+def test_search_by_word_prefix(searchable_posts):
+    published, hidden, other = searchable_posts
+    assert search.search('лодки') == [published.pk], (
+        'Убедитесь, что публичный поиск находит только опубликованные '
+        'посты.'
+    )
+    assert set(search.search('ЛОДК', visible_only=False)) == {
+        published.pk, hidden.pk
+    }
+    assert search.search('!!!') == []
+
+
+def test_search_ranks_title_higher(mixer, user, published_category):
+    in_text = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        title='Заметка', text='Лес, лес и снова лес.',
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+    in_title = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        title='Лес', text='Прогулка.',
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+    assert search.search('лес') == [in_title.pk, in_text.pk]
+
+
+def test_search_view(client, searchable_posts):
+    published, hidden, other = searchable_posts
+    response = client.get('/search/', {'q': 'лодки'})
+    assert response.status_code == HTTPStatus.OK
+    assert list(response.context['page_obj']) == [published], (
+        'Убедитесь, что страница поиска выводит найденные публикации.'
+    )
+    content = response.content.decode('utf-8')
+    assert published.title in content and other.title not in content
+
+
+def test_search_pagination_keeps_query(
+        client, mixer, user, published_category
+):
+    mixer.cycle(15).blend(
+        'blog.Post', author=user, category=published_category,
+        title='Закат', text='Море.',
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+    response = client.get('/search/', {'q': 'закат'})
+    assert len(response.context['page_obj']) == 10
+    assert (
+        'href="?q=%D0%B7%D0%B0%D0%BA%D0%B0%D1%82&amp;page=2">2</a>'
+        in response.content.decode('utf-8')
+    ), (
+        'Убедитесь, что в пагинации поиска выводятся номера страниц, а '
+        'ссылки сохраняют запрос.'
+    )
+
+
+def test_admin_search_uses_index(admin_client, searchable_posts):
+    published, hidden, other = searchable_posts
+    response = admin_client.get('/admin/blog/post/', {'q': 'рассвета'})
+    assert list(response.context['cl'].result_list) == [published], (
+        'Убедитесь, что поиск в админке ищет и по тексту публикации.'
+    )
+
+
+def test_index_follows_post_changes(searchable_posts):
+    published, hidden, other = searchable_posts
+    published.title = 'Паруса'
+    published.save()
+    assert search.search('паруса') == [published.pk], (
+        'Убедитесь, что изменение публикации сразу попадает в индекс.'
+    )
+    hidden.is_published = True
+    hidden.save()
+    assert search.search('черновик') == [hidden.pk], (
+        'Убедитесь, что снятие публикации с черновика открывает её в '
+        'поиске.'
+    )
+    other.delete()
+    assert search.search('горы', visible_only=False) == [], (
+        'Убедитесь, что удалённая публикация удаляется из индекса.'
+    )
+
+
+def test_index_follows_category_visibility(
+        searchable_posts, published_category
+):
+    published, hidden, other = searchable_posts
+    published_category.is_published = False
+    published_category.save()
+    assert search.search('лодки') == [], (
+        'Убедитесь, что посты снятой с публикации категории не выводятся '
+        'в поиске.'
+    )
+    published_category.is_published = True
+    published_category.save()
+    assert search.search('лодки') == [published.pk]
+    published_category.title = 'Новое название'
+    with CaptureQueriesContext(connection) as ctx:
+        published_category.save()
+    assert not any(
+        search.SEARCH_TABLE in query['sql'] or 'blog_feedentry' in query['sql']
+        for query in ctx.captured_queries
+    ), (
+        'Убедитесь, что сохранение категории без изменения флага '
+        'публикации не обновляет ленту и поисковый индекс.'
+    )
+
+
+def test_scheduled_post_visible_after_publish(
+        mixer, user, published_category
+):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        title='Премьера', text='Скоро.',
+        pub_date=timezone.now() + timezone.timedelta(hours=1),
+    )
+    assert search.search('премьера') == []
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timezone.timedelta(minutes=1)
+    )
+    feed.publish_due()
+    assert search.search('премьера') == [post.pk], (
+        'Убедитесь, что отложенная публикация появляется в поиске, когда '
+        'наступает её дата.'
+    )
+
+
+def test_reindex_command(searchable_posts, capsys):
+    published, hidden, other = searchable_posts
+    search.remove_posts(Post.objects.values_list('pk', flat=True))
+    assert search.search('лодки') == []
+    call_command('reindex', batch_size=2)
+    assert search.search('лодки') == [published.pk], (
+        'Убедитесь, что команда reindex перестраивает индекс.'
+    )
+    assert 'публикаций 3' in capsys.readouterr().out
+
+
+def test_category_delete_hides_posts(
+        client, searchable_posts, published_category
+):
+    published, hidden, other = searchable_posts
+    published_category.delete()
+    assert search.search('лодки') == [], (
+        'Убедитесь, что посты удалённой категории не выводятся в поиске.'
+    )
+    response = client.get('/search/', {'q': 'лодки'})
+    assert response.context['paginator'].count == 0
+
+
+def test_admin_search_not_capped(
+        admin_client, settings, mixer, user, published_category
+):
+    settings.SEARCH_MAX_RESULTS = 2
+    posts = mixer.cycle(3).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=False, title='Туман', text='Утро.',
+    )
+    assert len(search.search('туман', visible_only=False)) == 2
+    response = admin_client.get('/admin/blog/post/', {'q': 'туман'})
+    assert set(response.context['cl'].result_list) == set(posts), (
+        'Убедитесь, что поиск в админке находит все подходящие '
+        'публикации, без ограничения SEARCH_MAX_RESULTS.'
+    )
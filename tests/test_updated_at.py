@@ -0,0 +1,41 @@
+import pytest
+from django.utils import timezone
+
+from blog.models import Category, Location, Post, last_modified
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_changed_since_finds_saved_objects(
+        post_with_published_location, published_location
+):
+    moment = timezone.now()
+    assert not Post.objects.changed_since(moment).exists()
+    post = post_with_published_location
+    post.title = 'Новый заголовок'
+    post.save()
+    assert list(Post.objects.changed_since(moment)) == [post], (
+        'Убедитесь, что сохранение публикации обновляет поле `updated_at`.'
+    )
+    assert Post.objects.last_modified() == post.updated_at
+    assert not Location.objects.changed_since(moment).exists()
+
+
+def test_last_modified_combines_models_in_one_query(
+        django_assert_num_queries, post_with_published_location
+):
+    post = post_with_published_location
+    Category.objects.filter(pk=post.category_id).update(
+        updated_at=post.updated_at + timezone.timedelta(days=1)
+    )
+    category = Category.objects.get(pk=post.category_id)
+    with django_assert_num_queries(1):
+        latest = last_modified(
+            Post.objects.max_updated(),
+            Category.objects.max_updated(),
+            Location.objects.none().max_updated(),
+        )
+    assert latest == category.updated_at, (
+        'Убедитесь, что `last_modified()` возвращает наибольшую дату '
+        'изменения среди выборок.'
+    )